@@ -138,7 +138,7 @@ async def generate_document_summary(
                 "session_id": session_id
             }
             
-            result = indexing_service.index_file(temp_path, metadata)
+            result = indexing_service.index_file(temp_path, metadata, use_cache=False)
             
             if result.get("status") == "success":
                 # Refresh index
@@ -326,7 +326,7 @@ async def analyze_documents(
                     "session_id": session_id
                 }
                 
-                contract_result = indexing_service.index_file(contract_temp_path, contract_metadata)
+                contract_result = indexing_service.index_file(contract_temp_path, contract_metadata, use_cache=False)
                 results["contract_indexed"] = contract_result.get("status") == "success"
                 
             except Exception as e:
@@ -359,7 +359,7 @@ async def analyze_documents(
                     "session_id": session_id
                 }
                 
-                payout_result = indexing_service.index_file(payout_temp_path, payout_metadata)
+                payout_result = indexing_service.index_file(payout_temp_path, payout_metadata, use_cache=False)
                 results["payout_indexed"] = payout_result.get("status") == "success"
                 
             except Exception as e:
@@ -112,7 +112,7 @@ async def upload_and_index_file(
             }
             
             # Index the file
-            result = indexing_service.index_file(temp_file_path, metadata)
+            result = indexing_service.index_file(temp_file_path, metadata, use_cache=False)
             
             return {
                 "status": "success",
@@ -8,4 +8,6 @@ utilities that support the main business logic.
 Modules:
     - config: Application settings and environment configuration
     - prompts: AI prompt templates for RAG and analysis operations
+    - disk_cache: Size-bounded on-disk pickle cache for processed documents
+    - process_pool: Process pool settings shared by the document processors
 """
\ No newline at end of file
@@ -32,12 +32,30 @@ class Settings(BaseSettings):
         openai_api_key (str, optional): OpenAI API authentication key.
         openai_model (str): OpenAI model identifier for completions.
         openai_temperature (float): Model temperature for response variability.
+        embedding_model (str): OpenAI embedding model identifier.
+        embedding_dimensions (int): Shortened embedding size for text-embedding-3
+            models; 0 keeps the model's full size.
+        embedding_storage_dtype (str, optional): NumPy float dtype ("float16",
+            "float32") for chunk embeddings held in memory; empty keeps lists.
+        embedding_int8 (bool): Also store each chunk embedding as int8 codes
+            (embedding_i8) with its per-vector scale (embedding_scale).
+        embedding_max_concurrency (int): Embedding batch requests allowed in flight at once.
+        embedding_requests_per_minute (int): Embedding request start rate limit; 0 disables
+            pacing and relies on backoff after 429 responses.
+        embedding_batch_max_items (int): Maximum texts per embedding request.
+        embedding_batch_token_budget (int): Maximum total tokens per embedding request.
         opensearch_host (str): OpenSearch server hostname.
         opensearch_port (int): OpenSearch server port number.
         opensearch_index_name (str): Default document index name.
         max_file_size_mb (int): Maximum allowed file upload size in MB.
         chunk_size (int): Document chunking size for processing.
         chunk_overlap (int): Overlap size between document chunks.
+        chunking_strategy (str): "window" for fixed character windows or
+            "recursive" for paragraph/sentence/word aware splitting.
+        document_cache_dir (str, optional): Directory for cached document chunks
+            and embeddings; empty (the default) disables the on-disk caches.
+        document_cache_max_mb (int): Size limit per on-disk chunk cache; least
+            recently used entries are evicted beyond it, 0 disables the limit.
         streamlit_server_port (int): Streamlit frontend server port.
         demo_partner_name (str): Default partner name for demos.
         demo_partner_id (str): Default partner ID for demos.
@@ -57,6 +75,14 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = Field(default=None, env="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o-mini", env="OPENAI_MODEL")
     openai_temperature: float = Field(default=0.1, env="OPENAI_TEMPERATURE")
+    embedding_model: str = Field(default="text-embedding-3-small", env="EMBEDDING_MODEL")
+    embedding_dimensions: int = Field(default=512, env="EMBEDDING_DIMENSIONS")
+    embedding_storage_dtype: Optional[str] = Field(default="float32", env="EMBEDDING_STORAGE_DTYPE")
+    embedding_int8: bool = Field(default=False, env="EMBEDDING_INT8")
+    embedding_max_concurrency: int = Field(default=4, env="EMBEDDING_MAX_CONCURRENCY")
+    embedding_requests_per_minute: int = Field(default=0, env="EMBEDDING_REQUESTS_PER_MINUTE")
+    embedding_batch_max_items: int = Field(default=100, env="EMBEDDING_BATCH_MAX_ITEMS")
+    embedding_batch_token_budget: int = Field(default=250000, env="EMBEDDING_BATCH_TOKEN_BUDGET")
     
     # OpenSearch
     opensearch_host: str = Field(default="localhost", env="OPENSEARCH_HOST")
@@ -67,6 +93,9 @@ class Settings(BaseSettings):
     max_file_size_mb: int = Field(default=50, env="MAX_FILE_SIZE_MB")
     chunk_size: int = Field(default=1000, env="CHUNK_SIZE")
     chunk_overlap: int = Field(default=200, env="CHUNK_OVERLAP")
+    chunking_strategy: str = Field(default="window", env="CHUNKING_STRATEGY")
+    document_cache_dir: Optional[str] = Field(default="", env="DOCUMENT_CACHE_DIR")
+    document_cache_max_mb: int = Field(default=256, env="DOCUMENT_CACHE_MAX_MB")
     
     # Streamlit
     streamlit_server_port: int = Field(default=8501, env="STREAMLIT_SERVER_PORT")
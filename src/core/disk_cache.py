@@ -0,0 +1,134 @@
+"""
+Size-bounded on-disk pickle cache for processed documents.
+
+Stores one pickle per key under a cache directory. Keys are tuples describing
+everything the cached value depends on (file identity, processing settings,
+caller metadata) and are hashed into the entry file name. Repeat reads are
+served from a small in-memory LRU, and the directory is pruned to a size
+limit by evicting the least recently used entries after every write.
+
+Classes:
+    PickleDiskCache: Cache directory with get, put and prune operations
+"""
+import functools
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_entry(cache_path: str) -> Any:
+    """Unpickle a cache entry, memoized so repeat hits skip the disk read."""
+    with open(cache_path, 'rb') as cache_file:
+        return pickle.load(cache_file)
+
+
+class PickleDiskCache:
+    """Pickle cache directory bounded to a size limit.
+
+    Values returned by :meth:`get` are shared with the in-memory LRU, so
+    callers must copy them before handing them out for mutation.
+
+    Attributes:
+        cache_dir (Optional[str]): Directory holding the ``.pkl`` entries;
+            None disables the cache.
+        max_bytes (int): Size limit of cache_dir; 0 disables the limit.
+        version (int): Mixed into every key; bump it whenever the cached
+            values change for the same inputs, so stale entries are never served.
+
+    Example:
+        ```python
+        cache = PickleDiskCache(".cache/chunks", max_bytes=256 * 1024 * 1024)
+        chunks = cache.get(key)
+        if chunks is None:
+            chunks = build_chunks()
+            cache.put(key, chunks)
+        ```
+    """
+
+    def __init__(self, cache_dir: Optional[str], max_bytes: int = 0, version: int = 1):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a cache directory is configured."""
+        return bool(self.cache_dir)
+
+    @staticmethod
+    def clear_memory() -> None:
+        """Drop the in-memory copies of loaded entries; the disk is untouched."""
+        _load_entry.cache_clear()
+
+    def path_for(self, key: Tuple[Any, ...]) -> str:
+        """Return the entry file for key."""
+        digest = hashlib.sha1(repr((self.version, *key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or unreadable entry."""
+        if not self.enabled:
+            return None
+
+        cache_path = self.path_for(key)
+        try:
+            value = _load_entry(cache_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry '{cache_path}': {e}")
+            return None
+
+        # Mark the entry as recently used for prune()
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: Tuple[Any, ...], value: Any) -> None:
+        """Store value for key, then prune; failures only cost a future cache miss."""
+        if not self.enabled:
+            return
+
+        cache_path = self.path_for(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as cache_file:
+                pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+            self.prune()
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry '{cache_path}': {e}")
+
+    def prune(self) -> None:
+        """Evict least recently used entries until the directory fits in max_bytes."""
+        if not self.enabled or self.max_bytes <= 0:
+            return
+
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.pkl') and entry.is_file():
+                        entry_stat = entry.stat()
+                        entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry.path))
+                        total += entry_stat.st_size
+        except FileNotFoundError:
+            return
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,19 @@
+"""
+Process pool settings shared by the document processors.
+
+Worker processes are spawned, never forked: the processors may run inside
+the API server, whose request-loop thread, HTTP pools and SQLite connections
+must not be copied into a child.
+
+Constants:
+    PROCESS_POOL_CONTEXT: multiprocessing context for every ProcessPoolExecutor
+    PARALLEL_MIN_BYTES: Smallest total file size worth processing in a pool
+"""
+import multiprocessing
+
+PROCESS_POOL_CONTEXT = multiprocessing.get_context("spawn")
+
+# File sets smaller than this in total are processed in-process: each spawned
+# worker re-imports numpy, numba, fitz and pdfplumber, which takes about a
+# second, far longer than chunking a few small contracts
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
@@ -11,7 +11,7 @@ generate embeddings for semantic search, and store the results in OpenSearch
 for retrieval and analysis operations.
 """
 import logging
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
 import os
 from datetime import datetime
 
@@ -49,7 +49,8 @@ class DocumentIndexingService:
         self.embedding_service = EmbeddingService()
         self.opensearch_service = OpenSearchService()
     
-    def index_file(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def index_file(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None,
+                   use_cache: bool = True) -> Dict[str, Any]:
         """Process and index a single file with full pipeline processing.
         
         Executes the complete document indexing workflow including file parsing,
@@ -60,6 +61,8 @@ class DocumentIndexingService:
             file_path (str): Absolute path to the file to process.
             document_metadata (Dict[str, Any], optional): Additional metadata
                 to associate with the document for enhanced search and filtering.
+            use_cache (bool): Use the chunk cache, when enabled. Uploads pass
+                False since their temporary files are never seen again.
                 
         Returns:
             Dict[str, Any]: Indexing results containing processing statistics,
@@ -72,50 +75,26 @@ class DocumentIndexingService:
         logger.info(f"Starting indexing process for file: {file_path}")
         
         try:
-            # Step 1: Process document into chunks
-            logger.info("Step 1: Processing document into chunks...")
-            chunks = self.document_processor.process_file(file_path, document_metadata)
+            # Steps 1-3: Chunk the document, embed and index the chunks as they stream
+            logger.info("Processing document into chunks, generating embeddings and indexing...")
+            chunks = self.document_processor.iter_chunks(file_path, document_metadata, use_cache=use_cache)
+            total_count, indexed_count, failed_count = self._index_chunks(chunks)
             
-            if not chunks:
+            if not total_count:
                 raise ValueError("No chunks generated from document")
             
-            logger.info(f"Generated {len(chunks)} chunks from document")
-            
-            # Step 2: Generate embeddings for chunks
-            logger.info("Step 2: Generating embeddings...")
-            chunks_with_embeddings = self.embedding_service.add_embeddings_to_chunks(chunks)
-            
-            # Step 3: Index chunks in OpenSearch
-            logger.info("Step 3: Indexing chunks in OpenSearch...")
-            indexed_count = 0
-            failed_count = 0
-            
-            for chunk in chunks_with_embeddings:
-                try:
-                    success = self.opensearch_service.index_document(
-                        document=chunk,
-                        doc_id=chunk.get('chunk_id')
-                    )
-                    if success:
-                        indexed_count += 1
-                    else:
-                        failed_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to index chunk {chunk.get('chunk_id', 'unknown')}: {e}")
-                    failed_count += 1
-            
             # Step 4: Return results
             result = {
                 "status": "success",
                 "file_path": file_path,
-                "total_chunks": len(chunks),
+                "total_chunks": total_count,
                 "indexed_chunks": indexed_count,
                 "failed_chunks": failed_count,
                 "processing_time": datetime.now().isoformat(),
                 "document_metadata": document_metadata or {}
             }
             
-            logger.info(f"Indexing completed: {indexed_count}/{len(chunks)} chunks indexed successfully")
+            logger.info(f"Indexing completed: {indexed_count}/{total_count} chunks indexed successfully")
             return result
             
         except Exception as e:
@@ -141,50 +120,26 @@ class DocumentIndexingService:
         logger.info("Starting indexing process for raw text")
         
         try:
-            # Step 1: Process text into chunks
-            logger.info("Step 1: Processing text into chunks...")
-            chunks = self.document_processor.process_text(text, document_metadata)
+            # Steps 1-3: Chunk the text, embed and index the chunks as they stream
+            logger.info("Processing text into chunks, generating embeddings and indexing...")
+            chunks = self.document_processor.iter_text_chunks(text, document_metadata)
+            total_count, indexed_count, failed_count = self._index_chunks(chunks)
             
-            if not chunks:
+            if not total_count:
                 raise ValueError("No chunks generated from text")
             
-            logger.info(f"Generated {len(chunks)} chunks from text")
-            
-            # Step 2: Generate embeddings for chunks
-            logger.info("Step 2: Generating embeddings...")
-            chunks_with_embeddings = self.embedding_service.add_embeddings_to_chunks(chunks)
-            
-            # Step 3: Index chunks in OpenSearch
-            logger.info("Step 3: Indexing chunks in OpenSearch...")
-            indexed_count = 0
-            failed_count = 0
-            
-            for chunk in chunks_with_embeddings:
-                try:
-                    success = self.opensearch_service.index_document(
-                        document=chunk,
-                        doc_id=chunk.get('chunk_id')
-                    )
-                    if success:
-                        indexed_count += 1
-                    else:
-                        failed_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to index chunk {chunk.get('chunk_id', 'unknown')}: {e}")
-                    failed_count += 1
-            
             # Step 4: Return results
             result = {
                 "status": "success",
                 "source": "text_input",
-                "total_chunks": len(chunks),
+                "total_chunks": total_count,
                 "indexed_chunks": indexed_count,
                 "failed_chunks": failed_count,
                 "processing_time": datetime.now().isoformat(),
                 "document_metadata": document_metadata or {}
             }
             
-            logger.info(f"Text indexing completed: {indexed_count}/{len(chunks)} chunks indexed successfully")
+            logger.info(f"Text indexing completed: {indexed_count}/{total_count} chunks indexed successfully")
             return result
             
         except Exception as e:
@@ -196,6 +151,36 @@ class DocumentIndexingService:
                 "processing_time": datetime.now().isoformat()
             }
     
+    def _index_chunks(self, chunks: Iterable[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """Embed and index a stream of chunks, one embedding group at a time.
+        
+        Only the group currently being embedded is held in memory, instead of
+        every chunk of the document twice (with and without embeddings).
+        
+        Returns:
+            Tuple of (total, indexed, failed) chunk counts.
+        """
+        total_count = 0
+        indexed_count = 0
+        
+        for success in self._iter_index_chunks(chunks):
+            total_count += 1
+            indexed_count += success
+        
+        return total_count, indexed_count, total_count - indexed_count
+    
+    def _iter_index_chunks(self, chunks: Iterable[Dict[str, Any]]) -> Iterator[bool]:
+        """Embed and index a stream of chunks, yielding whether each one was indexed."""
+        for chunk in self.embedding_service.iter_chunks_with_embeddings(chunks):
+            try:
+                yield bool(self.opensearch_service.index_document(
+                    document=chunk,
+                    doc_id=chunk.get('chunk_id')
+                ))
+            except Exception as e:
+                logger.error(f"Failed to index chunk {chunk.get('chunk_id', 'unknown')}: {e}")
+                yield False
+    
     def index_directory(self, directory_path: str, file_extensions: List[str] = None) -> Dict[str, Any]:
         """
         Process and index all files in a directory.
@@ -246,25 +231,20 @@ class DocumentIndexingService:
             logger.warning(f"No files found with extensions {file_extensions} in {directory_path}")
             return results
         
-        # Process each file
+        # Pass 1: chunk every file. Embedding runs once over the whole directory
+        # afterwards, so API batches are filled across file boundaries instead of
+        # sending a partly filled batch per file.
+        all_chunks = []
+        chunk_owners = []  # file result each chunk in all_chunks belongs to
         for file_path in files_to_process:
             try:
                 # Generate metadata based on filename
                 filename = os.path.basename(file_path)
                 doc_metadata = self._generate_metadata_from_filename(filename)
                 
-                # Index the file
-                file_result = self.index_file(file_path, doc_metadata)
-                
-                # Update results
-                results["processed_files"].append(file_result)
-                
-                if file_result["status"] == "success":
-                    results["successful_files"] += 1
-                    results["total_chunks"] += file_result["total_chunks"]
-                    results["total_indexed_chunks"] += file_result["indexed_chunks"]
-                else:
-                    results["failed_files"] += 1
+                chunks = self.document_processor.process_file(file_path, doc_metadata)
+                if not chunks:
+                    raise ValueError("No chunks generated from document")
                 
             except Exception as e:
                 logger.error(f"Failed to process file {file_path}: {e}")
@@ -274,6 +254,32 @@ class DocumentIndexingService:
                     "file_path": file_path,
                     "error": str(e)
                 })
+                continue
+            
+            file_result = {
+                "status": "success",
+                "file_path": file_path,
+                "total_chunks": len(chunks),
+                "indexed_chunks": 0,
+                "failed_chunks": 0,
+                "processing_time": None,
+                "document_metadata": doc_metadata
+            }
+            results["processed_files"].append(file_result)
+            all_chunks.extend(chunks)
+            chunk_owners.extend([file_result] * len(chunks))
+        
+        # Pass 2: embed and index all chunks in full batches
+        logger.info(f"Generating embeddings and indexing {len(all_chunks)} chunks...")
+        for file_result, success in zip(chunk_owners, self._iter_index_chunks(all_chunks)):
+            file_result["indexed_chunks" if success else "failed_chunks"] += 1
+        
+        for file_result in results["processed_files"]:
+            if file_result["status"] == "success":
+                file_result["processing_time"] = datetime.now().isoformat()
+                results["successful_files"] += 1
+                results["total_chunks"] += file_result["total_chunks"]
+                results["total_indexed_chunks"] += file_result["indexed_chunks"]
         
         logger.info(f"Bulk indexing completed: {results['successful_files']}/{results['total_files']} files processed successfully")
         return results
@@ -317,6 +323,8 @@ class DocumentIndexingService:
             
             # Process results
             results = []
+            scored_results = []
+            scored_embeddings = []
             for hit in response["hits"]["hits"]:
                 result = {
                     "id": hit["_id"],
@@ -330,16 +338,22 @@ class DocumentIndexingService:
                     }
                 }
                 
-                # Calculate similarity if requested
+                # Collect embeddings to score if similarity is requested
                 if include_similarity and hit["_source"].get("embedding"):
-                    similarity = self.embedding_service.calculate_similarity(
-                        query_embedding, 
-                        hit["_source"]["embedding"]
-                    )
-                    result["similarity"] = similarity
+                    scored_results.append(result)
+                    scored_embeddings.append(hit["_source"]["embedding"])
                 
                 results.append(result)
             
+            # Score all hits against the query in one matrix product. Query and
+            # stored embeddings both come from OpenAI and are unit length.
+            if scored_embeddings:
+                similarities = self.embedding_service.calculate_similarity_matrix(
+                    [query_embedding], scored_embeddings, normalized=True
+                )[0]
+                for result, similarity in zip(scored_results, similarities.tolist()):
+                    result["similarity"] = similarity
+            
             return {
                 "status": "success",
                 "query": query,
@@ -6,8 +6,11 @@ metadata enrichment for RAG system integration.
 
 Key Features:
     - Multi-format document processing (PDF, TXT, MD)
-    - Multiple PDF parsing backends (pdfplumber, PyMuPDF, PyPDF2)
-    - Configurable chunking with overlap preservation
+    - Multiple PDF parsing backends (PyMuPDF, pdfplumber-rs, pdfplumber, PyPDF2)
+    - Configurable chunking with overlap preservation (fixed window or recursive
+      paragraph/sentence/word splitting)
+    - Numba-compiled chunk window search when numba is installed
+    - Persistent chunk cache keyed on file identity and chunking settings
     - File validation and security checks
     - Comprehensive metadata generation
 
@@ -18,16 +21,26 @@ Example:
     ```
 """
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
 import uuid
 from datetime import datetime
 import re
+import string
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
 
 try:
-    import pdfplumber
+    # Rust reimplementation of the pdfplumber API; preferred when installed
+    import pdfplumber_rs as pdfplumber
 except ImportError:
-    pdfplumber = None
+    try:
+        import pdfplumber
+    except ImportError:
+        pdfplumber = None
 
 try:
     import fitz  # PyMuPDF
@@ -39,21 +52,63 @@ try:
 except ImportError:
     PyPDF2 = None
 
+try:
+    # Optional JIT for the chunk window loop; the plain Python version is used otherwise
+    from numba import njit
+except ImportError:
+    njit = None
+
 from src.core.config import settings
+from src.core.disk_cache import PickleDiskCache
+from src.core.process_pool import PARALLEL_MIN_BYTES, PROCESS_POOL_CONTEXT
 
 logger = logging.getLogger(__name__)
 
 
+# Control characters other than tab/newline/carriage return are dropped; printable
+# text in any script (accents, currency symbols, ...) is kept
+_CONTROL_CHAR_TABLE = dict.fromkeys((*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F))
+_CONTROL_CHAR_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]')
+
+# Patterns for _clean_extracted_text, compiled once
+_PARAGRAPH_BREAK_RE = re.compile(r'\n{3,}')
+_SPACE_RUN_RE = re.compile(r'  +')
+_PUNCTUATION = '.,:;!?'
+_ASCII_ALNUM = frozenset(string.ascii_letters + string.digits)
+
+# Paragraph separator for the recursive chunker, matched before whitespace is collapsed
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+
+_CHUNKING_STRATEGIES = ("window", "recursive")
+
+# Per-byte lookup tables used to vectorize chunk boundary detection
+_IS_SPACE_BYTE = np.array([chr(b).isspace() for b in range(256)], dtype=bool)
+_IS_SENTENCE_TERMINATOR_BYTE = np.array([chr(b) in '.!?' for b in range(256)], dtype=bool)
+# Whitespace code points above Latin-1 (all are below U+3001), mapped to a space byte
+_NON_LATIN1_SPACES = np.array([c for c in range(0x100, 0x3001) if chr(c).isspace()], dtype=np.uint32)
+
+# PDFs shorter than this are extracted in-process; pool start-up would dominate
+_PARALLEL_PDF_MIN_PAGES = 16
+_PDF_EXTRACTION_MAX_WORKERS = 8
+
+# Bump whenever extraction or chunking changes the chunks produced for a file,
+# so stale on-disk cache entries are never served
+_CHUNK_CACHE_VERSION = 6
+
+
 class DocumentProcessor:
     """Processes restaurant contracts and payout reports with multi-format support.
     
     Handles PDF, TXT, and MD files with intelligent chunking and metadata enrichment.
-    Supports multiple PDF backends (pdfplumber, PyMuPDF, PyPDF2) with fallbacks.
+    Supports multiple PDF backends (PyMuPDF, pdfplumber, PyPDF2) with fallbacks.
     
     Attributes:
         chunk_size (int): Maximum characters per chunk.
         chunk_overlap (int): Character overlap between chunks.
+        chunking_strategy (str): "window" or "recursive" chunk boundaries.
         max_file_size (int): Maximum file size in bytes.
+        cache (PickleDiskCache): Per-file chunk cache, disabled unless
+            settings.document_cache_dir is set.
     
     Example:
         ```python
@@ -93,8 +148,9 @@ class DocumentProcessor:
         
         Backend Availability:
             The initialization checks for available PDF processing libraries:
-            - pdfplumber: Preferred for complex layouts and table extraction
-            - PyMuPDF (fitz): High-performance alternative for large documents
+            - PyMuPDF (fitz): Preferred; native text and table extraction
+            - pdfplumber: Pure-Python alternative with the same table handling
+              (the Rust pdfplumber-rs port is used instead when installed)
             - PyPDF2: Fallback option for basic PDF processing
         
         Note:
@@ -106,19 +162,39 @@ class DocumentProcessor:
         Default Configuration:
             - chunk_size: From settings.chunk_size (typically 1000-2000 characters)
             - chunk_overlap: From settings.chunk_overlap (typically 200 characters)
+            - chunking_strategy: From settings.chunking_strategy ("window" or "recursive")
             - max_file_size: From settings.max_file_size_mb converted to bytes
         """
         self.chunk_size = settings.chunk_size
         self.chunk_overlap = settings.chunk_overlap
+        self.chunking_strategy = settings.chunking_strategy
+        if self.chunking_strategy not in _CHUNKING_STRATEGIES:
+            raise ValueError(
+                f"Unsupported chunking strategy: {self.chunking_strategy} "
+                f"(expected one of {', '.join(_CHUNKING_STRATEGIES)})"
+            )
         self.max_file_size = settings.max_file_size_mb * 1024 * 1024  # Convert to bytes
+        self.cache = PickleDiskCache(
+            os.path.join(settings.document_cache_dir, "chunks") if settings.document_cache_dir else None,
+            max_bytes=settings.document_cache_max_mb * 1024 * 1024,
+            version=_CHUNK_CACHE_VERSION,
+        )
+        # Opt-in for batch paths: a spawned page pool costs about a second to
+        # start, so request handling extracts pages in-process
+        self.parallel_pdf_pages = False
     
-    def process_file(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    def process_file(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None,
+                     file_stat: Optional[os.stat_result] = None, use_cache: bool = True) -> List[Dict[str, Any]]:
         """Process document files with text extraction and chunking.
         
         Args:
             file_path (str): Path to document file (PDF, TXT, MD).
             document_metadata (Optional[Dict[str, Any]]): Additional metadata
                 for document and chunks.
+            file_stat (Optional[os.stat_result]): Stat result the caller already
+                holds for file_path (e.g. from os.scandir); saves a stat call.
+            use_cache (bool): Read and write the chunk cache, when enabled.
+                Pass False for one-off files such as API uploads.
         
         Returns:
             List[Dict[str, Any]]: Document chunks with metadata including
@@ -137,14 +213,52 @@ class DocumentProcessor:
             )
             ```
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
+        return list(self.iter_chunks(file_path, document_metadata, file_stat, use_cache))
+    
+    def iter_chunks(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None,
+                    file_stat: Optional[os.stat_result] = None, use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield a file's chunks one at a time as they are created.
+        
+        Lets callers embed or index a large document in batches without
+        holding every chunk at once. When the chunk cache is enabled, copies
+        are still collected and stored once the generator is exhausted.
+        
+        Args:
+            file_path (str): Path to document file (PDF, TXT, MD).
+            document_metadata (Optional[Dict[str, Any]]): Additional metadata
+                for document and chunks.
+            file_stat (Optional[os.stat_result]): Stat result the caller already
+                holds for file_path.
+            use_cache (bool): Read and write the chunk cache, when enabled.
+        
+        Yields:
+            Dict[str, Any]: Document chunks in document order.
+        
+        Raises:
+            FileNotFoundError: File path does not exist.
+            ValueError: File size exceeds limits or unsupported format.
+        """
+        if file_stat is None:
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found: {file_path}")
         
         # Check file size
-        file_size = os.path.getsize(file_path)
+        file_size = file_stat.st_size
         if file_size > self.max_file_size:
             raise ValueError(f"File size ({file_size} bytes) exceeds maximum allowed size ({self.max_file_size} bytes)")
         
+        # Unchanged files with identical settings produce identical chunks
+        cache_key = self._chunk_cache_key(file_path, file_stat, document_metadata) if use_cache else None
+        cached_chunks = self.cache.get(cache_key) if cache_key else None
+        if cached_chunks is not None:
+            logger.info(f"Loaded {len(cached_chunks)} cached chunks for '{file_path}'")
+            # Callers may mutate chunks; never hand out the memoized objects
+            for chunk in cached_chunks:
+                yield dict(chunk)
+            return
+        
         # Extract text based on file type
         file_extension = os.path.splitext(file_path)[1].lower()
         
@@ -155,7 +269,8 @@ class DocumentProcessor:
         else:
             raise ValueError(f"Unsupported file type: {file_extension}")
         
-        if not text.strip():
+        # isspace() answers the emptiness check without copying the text like strip()
+        if not text or text.isspace():
             raise ValueError("No text content found in the file")
         
         # Generate metadata
@@ -171,11 +286,19 @@ class DocumentProcessor:
         if document_metadata:
             base_metadata.update(document_metadata)
         
-        # Create chunks
-        chunks = self._create_chunks(text, base_metadata)
-        
-        logger.info(f"Processed file '{file_path}': {len(chunks)} chunks created")
-        return chunks
+        # Create chunks; copies go to the cache so callers can mutate the
+        # chunks they receive
+        cache_chunks = [] if cache_key else None
+        chunk_count = 0
+        for chunk in self._iter_chunks(text, base_metadata):
+            if cache_chunks is not None:
+                cache_chunks.append(dict(chunk))
+            chunk_count += 1
+            yield chunk
+        if cache_key:
+            self.cache.put(cache_key, cache_chunks)
+        
+        logger.info(f"Processed file '{file_path}': {chunk_count} chunks created")
     
     def process_text(self, text: str, document_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
@@ -188,7 +311,20 @@ class DocumentProcessor:
         Returns:
             List of document chunks with metadata
         """
-        if not text.strip():
+        return list(self.iter_text_chunks(text, document_metadata))
+    
+    def iter_text_chunks(self, text: str, document_metadata: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield chunks of raw text one at a time as they are created.
+        
+        Args:
+            text: Raw text content
+            document_metadata: Additional metadata for the document
+            
+        Yields:
+            Document chunks with metadata, in document order
+        """
+        if not text or text.isspace():
             raise ValueError("Text content cannot be empty")
         
         # Generate metadata
@@ -202,225 +338,572 @@ class DocumentProcessor:
             base_metadata.update(document_metadata)
         
         # Create chunks
-        chunks = self._create_chunks(text, base_metadata)
+        chunk_count = 0
+        for chunk in self._iter_chunks(text, base_metadata):
+            chunk_count += 1
+            yield chunk
         
-        logger.info(f"Processed text: {len(chunks)} chunks created")
-        return chunks
+        logger.info(f"Processed text: {chunk_count} chunks created")
+    
+    def _chunk_cache_key(self, file_path: str, file_stat: os.stat_result,
+                         document_metadata: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+        """Build the chunk cache key for a file, or None when caching is disabled.
+        
+        The key covers the file identity (absolute path, mtime, size), the
+        chunking configuration and the caller metadata, so any change to the
+        file or settings maps to a fresh entry.
+        """
+        if not self.cache.enabled:
+            return None
+        
+        return (
+            os.path.abspath(file_path),
+            file_stat.st_mtime_ns,
+            file_stat.st_size,
+            self.chunk_size,
+            self.chunk_overlap,
+            self.chunking_strategy,
+            json.dumps(document_metadata or {}, sort_keys=True, default=str),
+        )
     
     def _extract_pdf_text(self, file_path: str) -> str:
         """
-        Extract text from a PDF using pdfplumber with enhanced table handling.
-        This method preserves table structure and layout-aware text extraction.
+        Extract text from a PDF with enhanced table handling.
+        
+        Uses PyMuPDF when installed and pdfplumber otherwise; both render
+        detected tables as [TABLE n] blocks ahead of the page text.
         """
-        if not pdfplumber:
-            logger.error("pdfplumber is not installed. Cannot process PDF files.")
-            raise ImportError("pdfplumber is required for PDF processing.")
+        if not fitz and not pdfplumber:
+            logger.error("Neither PyMuPDF nor pdfplumber is installed. Cannot process PDF files.")
+            raise ImportError("PyMuPDF or pdfplumber is required for PDF processing.")
 
+        backend = "PyMuPDF" if fitz else "pdfplumber"
         text = ""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                page_texts = []
-                
-                for page_num, page in enumerate(pdf.pages):
-                    page_text = ""
-                    
-                    # Extract tables first
-                    tables = page.extract_tables()
-                    if tables:
-                        logger.info(f"Found {len(tables)} tables on page {page_num + 1}")
-                        for table_num, table in enumerate(tables):
-                            page_text += f"\n[TABLE {table_num + 1}]\n"
-                            for row in table:
-                                if row:  # Skip empty rows
-                                    # Clean and join row cells
-                                    cleaned_row = [str(cell).strip() if cell else "" for cell in row]
-                                    page_text += " | ".join(cleaned_row) + "\n"
-                            page_text += "[END TABLE]\n\n"
-                    
-                    # Extract regular text (excluding table areas if possible)
-                    try:
-                        # Try to get text outside of tables
-                        regular_text = page.extract_text(layout=True, x_tolerance=1)
-                        if regular_text:
-                            page_text += regular_text
-                    except:
-                        # Fallback to basic text extraction
-                        regular_text = page.extract_text()
-                        if regular_text:
-                            page_text += regular_text
-                    
-                    if page_text.strip():
-                        page_texts.append(page_text)
-
-                text = "\n\n".join(page_texts)
-
-            # Apply a light cleaning pass
+            page_texts = self._extract_pdf_pages(file_path)
+            text = "\n\n".join(page_texts)
+
+            # Apply a light cleaning pass (its result is already stripped)
             cleaned_text = self._clean_extracted_text(text)
 
-            if cleaned_text.strip():
-                logger.info(f"Successfully extracted text from '{file_path}' using pdfplumber with table handling.")
+            if cleaned_text:
+                logger.info(f"Successfully extracted text from '{file_path}' using {backend} with table handling.")
                 return cleaned_text
             else:
                 # If enhanced extraction returns nothing, try basic fallback
                 logger.warning(f"Enhanced extraction for '{file_path}' yielded empty text. Trying basic extraction.")
-                with pdfplumber.open(file_path) as pdf:
-                    page_texts = [p.extract_text() for p in pdf.pages if p.extract_text()]
-                    text = "\n\n".join(page_texts)
+                if fitz:
+                    with fitz.open(file_path) as document:
+                        page_texts = [p.get_text() for p in document]
+                else:
+                    with pdfplumber.open(file_path) as pdf:
+                        page_texts = [p.extract_text() for p in pdf.pages]
+                text = "\n\n".join(page_text for page_text in page_texts if page_text)
                 cleaned_text = self._clean_extracted_text(text)
-                if cleaned_text.strip():
+                if cleaned_text:
                     return cleaned_text
                 else:
                     raise ValueError("Extracted text was empty after all processing attempts.")
 
         except Exception as e:
-            logger.error(f"Failed to extract text from '{file_path}' with pdfplumber: {e}")
+            logger.error(f"Failed to extract text from '{file_path}' with {backend}: {e}")
             raise ValueError(f"PDF extraction failed for file: {file_path}")
         
         return ""
 
+    def _extract_pdf_pages(self, file_path: str) -> List[str]:
+        """Extract the non-empty text of every PDF page, in page order.
+        
+        Large documents are split into contiguous page ranges handled by worker
+        processes. Table detection is Python-level work in both backends and
+        PyMuPDF documents must not be shared between threads, so threads would
+        not run pages concurrently.
+        """
+        # A single worker would only add process start-up to sequential extraction
+        workers = min(_PDF_EXTRACTION_MAX_WORKERS, os.cpu_count() or 1) if self.parallel_pdf_pages else 1
+        
+        if fitz:
+            with fitz.open(file_path) as document:
+                page_count = document.page_count
+                if page_count < _PARALLEL_PDF_MIN_PAGES or workers == 1:
+                    return _extract_fitz_pages(document, 0, page_count)
+        else:
+            with pdfplumber.open(file_path) as pdf:
+                page_count = len(pdf.pages)
+                if page_count < _PARALLEL_PDF_MIN_PAGES or workers == 1:
+                    return _extract_pdfplumber_pages(pdf, 0, page_count)
+        
+        pages_per_worker = -(-page_count // workers)
+        first_pages = list(range(0, page_count, pages_per_worker))
+        last_pages = [min(first + pages_per_worker, page_count) for first in first_pages]
+        
+        try:
+            with ProcessPoolExecutor(max_workers=len(first_pages), mp_context=PROCESS_POOL_CONTEXT) as executor:
+                page_ranges = executor.map(_extract_pdf_page_range, repeat(file_path), first_pages, last_pages)
+                return [page_text for page_range in page_ranges for page_text in page_range]
+        except (OSError, RuntimeError) as e:
+            # Process pools are unavailable in some sandboxes; extract in-process instead
+            logger.warning(f"Parallel extraction unavailable for '{file_path}', falling back to sequential: {e}")
+            return _extract_pdf_page_range(file_path, 0, page_count)
+    
     def _clean_extracted_text(self, text: str) -> str:
         """Apply light cleaning, assuming layout and spacing are mostly correct."""
         if not text:
             return ""
 
-        # Normalize whitespace: collapse multiple spaces/tabs to one, but preserve newlines
-        text = re.sub(r'[ \t]+', ' ', text)
-        
         # Collapse more than two newlines (paragraph breaks) into two
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        if '\n\n\n' in text:
+            text = _PARAGRAPH_BREAK_RE.sub('\n\n', text)
 
-        # Change single newlines that are not part of a paragraph break into spaces
-        text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
+        # Change single newlines that are not part of a paragraph break into spaces.
+        # Newline runs are now at most two long, so splitting on paragraph breaks
+        # leaves only single newlines inside each part.
+        if '\n' in text:
+            text = '\n\n'.join(part.replace('\n', ' ') for part in text.split('\n\n'))
 
-        # Correct spacing around punctuation
-        text = re.sub(r'\s+([.,:;!?])', r'\1', text) # remove space before
-        text = re.sub(r'([.,:;!?])([a-zA-Z0-9])', r'\1 \2', text) # add space after
+        # Normalize whitespace: collapse runs of spaces/tabs (including spaces left
+        # by the newline pass) to one, in a single pass that skips lone spaces
+        if '\t' in text:
+            text = text.replace('\t', ' ')
+        text = _SPACE_RUN_RE.sub(' ', text)
 
-        # Re-run whitespace collapse in case the punctuation rules added extra spaces
-        text = re.sub(r' +', ' ', text)
+        # Correct spacing around punctuation
+        text = self._fix_punctuation_spacing(text)
 
         return text.strip()
     
+    def _fix_punctuation_spacing(self, text: str) -> str:
+        """Remove whitespace before and add a space after ``.,:;!?`` marks.
+        
+        Splitting on each mark lets str methods in C work only on the text
+        next to punctuation, instead of regexes probing every character.
+        """
+        for mark in _PUNCTUATION:
+            if mark not in text:
+                continue
+            parts = text.split(mark)
+            tail = parts.pop()
+            # Remove whitespace before the mark
+            parts = [part.rstrip() for part in parts]
+            parts.append(tail)
+            # Add a space after the mark when a letter or digit follows directly
+            text = mark.join([parts[0]] + [' ' + part if part[:1] in _ASCII_ALNUM else part for part in parts[1:]])
+        return text
+    
     def _extract_text_file(self, file_path: str) -> str:
         """Extract text from text file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            try:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    return file.read()
-            except Exception as e:
-                logger.error(f"Failed to read text file '{file_path}': {e}")
-                raise ValueError(f"Error reading text file: {e}")
+            # Read the raw bytes in one call and decode once; the latin-1 fallback
+            # then reuses the same buffer instead of reading the file again
+            with open(file_path, 'rb') as file:
+                raw = file.read()
         except Exception as e:
             logger.error(f"Failed to read text file '{file_path}': {e}")
             raise ValueError(f"Error reading text file: {e}")
+        
+        # Match the universal newline handling of text mode reads. Done on the
+        # bytes, which are smaller than the decoded str; CR and LF never occur
+        # inside multi-byte UTF-8 sequences.
+        if b'\r' in raw:
+            raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            # Try with different encoding
+            return raw.decode('latin-1')
     
     def _create_chunks(self, text: str, base_metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Split text into overlapping chunks; see _iter_chunks."""
+        return list(self._iter_chunks(text, base_metadata))
+    
+    def _iter_chunks(self, text: str, base_metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         """
-        Split text into overlapping chunks.
+        Split text into overlapping chunks, yielding each as it is built.
         
         Args:
             text: Text to chunk
             base_metadata: Base metadata to include in each chunk
             
-        Returns:
-            List of chunks with metadata
+        Yields:
+            Chunks with metadata
         """
-        # Clean and normalize text
-        text = self._clean_text(text)
+        # Clean and normalize text, then pick chunk spans for the configured strategy
+        if self.chunking_strategy == "recursive":
+            text = self._clean_paragraphs(text)
+            spans = self._recursive_spans(text)
+        else:
+            text = self._clean_text(text)
+            spans = self._window_spans(text)
         
-        chunks = []
-        start = 0
         chunk_number = 0
-        
-        while start < len(text):
-            # Calculate end position
-            end = start + self.chunk_size
-            
-            # If we're not at the end of the text, try to break at a sentence or word boundary
-            if end < len(text):
-                # Look for sentence boundary (. ! ?)
-                sentence_break = self._find_sentence_boundary(text, start, end)
-                if sentence_break != -1:
-                    end = sentence_break
-                else:
-                    # Look for word boundary
-                    word_break = self._find_word_boundary(text, start, end)
-                    if word_break != -1:
-                        end = word_break
-            
-            # Extract chunk
-            chunk_text = text[start:end].strip()
-            
-            if chunk_text:  # Only add non-empty chunks
-                chunk_id = f"{base_metadata.get('file_name', 'unknown')}_{chunk_number}"
-                
+        # One timestamp and id prefix per document; every chunk is created in the same
+        # call, so chunks share the document's processed_at string when it has one
+        created_at = base_metadata.get("processed_at") or datetime.now().isoformat()
+        chunk_id_prefix = f"{base_metadata.get('file_name', 'unknown')}_"
+        
+        for start, end, content_start, content_end in spans:
+            if content_end > content_start:  # Only add non-empty chunks
+                # Content bounds already exclude surrounding whitespace: one slice, no strip
+                chunk_text = text[content_start:content_end]
                 chunk = {
-                    "chunk_id": chunk_id,
+                    "chunk_id": chunk_id_prefix + str(chunk_number),
                     "content": chunk_text,
                     "chunk_number": chunk_number,
                     "start_position": start,
                     "end_position": end,
                     "chunk_size": len(chunk_text),
-                    "created_at": datetime.now().isoformat(),
-                    **base_metadata  # Include all base metadata
+                    "created_at": created_at,
                 }
+                # Base metadata stays flat on the chunk: OpenSearch indexes and filters
+                # on these top-level fields (document_type, partner_name, ...)
+                chunk.update(base_metadata)
                 
-                chunks.append(chunk)
+                yield chunk
                 chunk_number += 1
+    
+    def _window_spans(self, text: str) -> List[List[int]]:
+        """Split cleaned text into fixed-size overlapping windows.
+        
+        Each window ends at the last sentence boundary, or failing that the
+        last word boundary, shortly before ``chunk_size`` characters.
+        
+        Returns:
+            ``[start, end, content_start, content_end]`` rows; the content
+            bounds exclude whitespace at either end of the window.
+        """
+        sentence_ends, word_breaks = self._boundary_positions(text)
+        spans = _window_span_indices(
+            sentence_ends, word_breaks, len(text), self.chunk_size, self.chunk_overlap
+        )
+        return _content_span_indices(spans, word_breaks, len(text)).tolist()
+    
+    def _recursive_spans(self, text: str) -> List[List[int]]:
+        """Split paragraph-separated text at the coarsest boundaries that fit.
+        
+        Paragraphs are packed greedily into chunks of up to ``chunk_size``
+        characters. Paragraphs that are too long on their own are split into
+        sentences, then words, then hard character cuts. Consecutive chunks
+        share whole trailing segments of up to ``chunk_overlap`` characters.
+        
+        Returns:
+            ``[start, end, content_start, content_end]`` rows, as for
+            :meth:`_window_spans`.
+        """
+        sentence_ends, word_breaks = self._boundary_positions(text)
+        
+        text_length = len(text)
+        segments = []
+        paragraph_start = 0
+        while paragraph_start < text_length:
+            paragraph_end = text.find('\n\n', paragraph_start)
+            if paragraph_end == -1:
+                paragraph_end = text_length
+            self._split_segment(paragraph_start, paragraph_end, sentence_ends, word_breaks, segments)
+            paragraph_start = paragraph_end + 2
+        
+        spans = []
+        first = 0
+        while first < len(segments):
+            chunk_start = segments[first][0]
+            last = first
+            while last + 1 < len(segments) and segments[last + 1][1] - chunk_start <= self.chunk_size:
+                last += 1
+            chunk_end = segments[last][1]
+            spans.append((chunk_start, chunk_end))
             
-            # Move to next chunk with overlap
-            start = max(start + self.chunk_size - self.chunk_overlap, end)
-            
-            # Prevent infinite loop
-            if start >= len(text):
+            if last == len(segments) - 1:
                 break
-        
-        return chunks
+            
+            # Carry trailing segments that fit in the overlap into the next chunk,
+            # as long as the following segment still fits alongside them
+            next_first = last + 1
+            next_end = segments[next_first][1]
+            while (next_first - 1 > first
+                   and chunk_end - segments[next_first - 1][0] <= self.chunk_overlap
+                   and next_end - segments[next_first - 1][0] <= self.chunk_size):
+                next_first -= 1
+            first = next_first
+        
+        spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+        return _content_span_indices(spans, word_breaks, text_length).tolist()
+    
+    def _split_segment(self, start: int, end: int, sentence_ends: np.ndarray,
+                       word_breaks: np.ndarray, segments: List[Tuple[int, int]]) -> None:
+        """Append spans of at most ``chunk_size`` characters covering ``text[start:end]``."""
+        if end - start <= self.chunk_size:
+            segments.append((start, end))
+            return
+        
+        # Sentence boundaries strictly inside the span
+        first = int(np.searchsorted(sentence_ends, start, side='right'))
+        last = int(np.searchsorted(sentence_ends, end, side='left'))
+        if first < last:
+            piece_start = start
+            for boundary in sentence_ends[first:last].tolist():
+                self._split_words(piece_start, boundary, word_breaks, segments)
+                piece_start = boundary
+            self._split_words(piece_start, end, word_breaks, segments)
+        else:
+            self._split_words(start, end, word_breaks, segments)
+    
+    def _split_words(self, start: int, end: int, word_breaks: np.ndarray,
+                     segments: List[Tuple[int, int]]) -> None:
+        """Append spans cut at the last whitespace that keeps each within ``chunk_size``."""
+        while end - start > self.chunk_size:
+            limit = start + self.chunk_size
+            index = int(np.searchsorted(word_breaks, limit, side='right')) - 1
+            cut = int(word_breaks[index]) if index >= 0 and word_breaks[index] > start else limit
+            segments.append((start, cut))
+            start = cut
+        segments.append((start, end))
+    
+    def _clean_paragraphs(self, text: str) -> str:
+        """Clean each paragraph separately and rejoin them with blank lines."""
+        paragraphs = (self._clean_text(paragraph) for paragraph in _PARAGRAPH_SPLIT_RE.split(text))
+        return '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text."""
-        # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove excessive newlines
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        # Collapse every whitespace run, newlines included, to a single space.
+        # str.split() finds the runs in C and also drops leading/trailing space.
+        text = ' '.join(text.split())
         
-        # Remove non-printable characters (keep basic punctuation)
-        text = re.sub(r'[^\x20-\x7E\n\r\t]', '', text)
+        # Remove control characters; non-ASCII letters and symbols are content
+        text = self._strip_non_printable(text)
         
         return text.strip()
     
-    def _find_sentence_boundary(self, text: str, start: int, preferred_end: int) -> int:
-        """Find the best sentence boundary near the preferred end position."""
-        # Look backwards from preferred_end for sentence endings
-        search_start = max(start, preferred_end - 200)  # Don't search too far back
-        
-        for i in range(preferred_end - 1, search_start - 1, -1):
-            if text[i] in '.!?' and i + 1 < len(text) and text[i + 1].isspace():
-                return i + 1
+    def _strip_non_printable(self, text: str) -> str:
+        """Drop C0/C1 control characters except tab and newlines."""
+        # translate() runs a cached per-character table in C for ASCII text; the
+        # regex is faster when most code points would miss that cache.
+        if text.isascii():
+            return text.translate(_CONTROL_CHAR_TABLE)
+        return _CONTROL_CHAR_RE.sub('', text)
+    
+    def _boundary_positions(self, text: str) -> tuple[np.ndarray, np.ndarray]:
+        """Locate every sentence end and whitespace position in one vectorized pass.
         
-        return -1
+        Returns:
+            Sorted arrays of sentence boundaries (the index just after a
+            '.', '!' or '?' that is followed by whitespace) and of whitespace
+            character indices.
+        """
+        # One byte per character keeps byte offsets equal to string offsets
+        try:
+            buffer = np.frombuffer(text.encode('latin-1'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            # Characters beyond Latin-1 (e.g. '€') become NUL, which is neither
+            # whitespace nor a terminator ('replace' would turn them into '?');
+            # Unicode spaces such as U+2009 become a plain space
+            codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+            buffer = np.where(codes < 256, codes, 0).astype(np.uint8)
+            buffer[np.isin(codes, _NON_LATIN1_SPACES)] = 0x20
+        is_space = _IS_SPACE_BYTE[buffer]
+        
+        is_sentence_end = _IS_SENTENCE_TERMINATOR_BYTE[buffer[:-1]] & is_space[1:]
+        sentence_ends = np.flatnonzero(is_sentence_end) + 1
+        word_breaks = np.flatnonzero(is_space)
+        return sentence_ends, word_breaks
+
+
+def _window_span_indices(sentence_ends: np.ndarray, word_breaks: np.ndarray, text_length: int,
+                         chunk_size: int, chunk_overlap: int) -> np.ndarray:
+    """Compute ``(start, end)`` rows of the overlapping chunk windows.
     
-    def _find_word_boundary(self, text: str, start: int, preferred_end: int) -> int:
-        """Find the best word boundary near the preferred end position."""
-        # Look backwards from preferred_end for word boundaries
-        search_start = max(start, preferred_end - 50)  # Don't search too far back
+    Works on the boundary arrays only, so numba can compile it to a tight
+    native loop; without numba it runs as ordinary Python.
+    """
+    # Every window advances start by at least max(chunk_size - chunk_overlap, 1)
+    spans = np.empty((text_length // max(chunk_size - chunk_overlap, 1) + 1, 2), dtype=np.int64)
+    count = 0
+    start = 0
+    
+    while start < text_length:
+        # Calculate end position
+        end = start + chunk_size
+        
+        # If we're not at the end of the text, try to break at a sentence or word boundary
+        if end < text_length:
+            # Look backwards for a sentence ending (. ! ?), but not too far back
+            index = np.searchsorted(sentence_ends, end, side='right') - 1
+            if index >= 0 and sentence_ends[index] > max(start, end - 200):
+                end = sentence_ends[index]
+            else:
+                # Look for word boundary
+                index = np.searchsorted(word_breaks, end, side='left') - 1
+                if index >= 0 and word_breaks[index] >= max(start, end - 50):
+                    end = word_breaks[index]
         
-        for i in range(preferred_end - 1, search_start - 1, -1):
-            if text[i].isspace():
-                return i
+        spans[count, 0] = start
+        spans[count, 1] = end
+        count += 1
         
-        return -1
+        # Move to next chunk with overlap
+        start = max(start + chunk_size - chunk_overlap, end)
+    
+    return spans[:count]
+
+
+def _content_span_indices(spans: np.ndarray, word_breaks: np.ndarray, text_length: int) -> np.ndarray:
+    """Add the bounds of each span's text without surrounding whitespace.
+    
+    Equivalent to ``text[start:end].strip()`` but reads the sorted whitespace
+    offsets instead of the text, so chunks are sliced once and never copied
+    again by ``strip``.
+    
+    Returns:
+        ``(start, end, content_start, content_end)`` rows.
+    """
+    bounds = np.empty((spans.shape[0], 4), dtype=np.int64)
+    break_count = word_breaks.shape[0]
+    
+    for row in range(spans.shape[0]):
+        start = spans[row, 0]
+        # The last window may end past the text, as slicing allows
+        end = min(spans[row, 1], text_length)
+        
+        # Skip the whitespace run starting at start, if any
+        index = np.searchsorted(word_breaks, start)
+        while start < end and index < break_count and word_breaks[index] == start:
+            start += 1
+            index += 1
+        
+        # Back off the whitespace run ending at end, if any
+        index = np.searchsorted(word_breaks, end) - 1
+        while end > start and index >= 0 and word_breaks[index] == end - 1:
+            end -= 1
+            index -= 1
+        
+        bounds[row, 0] = spans[row, 0]
+        bounds[row, 1] = spans[row, 1]
+        bounds[row, 2] = start
+        bounds[row, 3] = end
+    
+    return bounds
+
+
+if njit is not None:
+    _window_span_indices = njit(cache=True)(_window_span_indices)
+    _content_span_indices = njit(cache=True)(_content_span_indices)
+
+
+def _render_tables(parts: List[str], tables: List[List[List[Any]]]) -> None:
+    """Append extracted table rows to parts as pipe-separated [TABLE n] blocks."""
+    for table_num, table in enumerate(tables):
+        parts.append(f"\n[TABLE {table_num + 1}]\n")
+        for row in table:
+            if row:  # Skip empty rows
+                # Clean and join row cells
+                cleaned_row = [str(cell).strip() if cell else "" for cell in row]
+                parts.append(" | ".join(cleaned_row))
+                parts.append("\n")
+        parts.append("[END TABLE]\n\n")
+
+
+def _extract_fitz_page(page: Any, page_num: int) -> str:
+    """Extract one PyMuPDF page, rendering its tables before the page text."""
+    # Collect pieces and join once; += on the page string is quadratic in table rows
+    parts = []
+    
+    # Extract tables first (find_tables needs PyMuPDF 1.23+). Text-only pages
+    # skip the table finder, which costs far more than reading the page text.
+    has_table_finder = hasattr(page, "find_tables") and _fitz_page_has_table_graphics(page)
+    tables = page.find_tables().tables if has_table_finder else []
+    if tables:
+        logger.info(f"Found {len(tables)} tables on page {page_num + 1}")
+        _render_tables(parts, [table.extract() for table in tables])
+    
+    regular_text = page.get_text("text")
+    if regular_text:
+        parts.append(regular_text)
+    
+    return "".join(parts)
+
+
+def _fitz_page_has_table_graphics(page: Any) -> bool:
+    """Tell whether a page has vector graphics that could outline a table.
+    
+    find_tables() uses the "lines" strategy, which builds cells only from
+    drawn lines and rectangles and ignores graphics covering 80% or more of
+    the page (e.g. a white page background). Without any other drawing it
+    cannot find a table, so the check is exact for that strategy.
+    """
+    background_area = abs(page.rect) * 0.8
+    for drawing in page.get_cdrawings():
+        x0, y0, x1, y1 = drawing["rect"]
+        if (x1 - x0) * (y1 - y0) < background_area:
+            return True
+    return False
+
+
+def _extract_fitz_pages(document: Any, first_page: int, last_page: int) -> List[str]:
+    """Extract pages [first_page, last_page) of an open PyMuPDF document, dropping blank pages."""
+    page_texts = []
+    for page_num in range(first_page, last_page):
+        page_text = _extract_fitz_page(document[page_num], page_num)
+        if page_text and not page_text.isspace():
+            page_texts.append(page_text)
+    return page_texts
+
+
+def _extract_pdfplumber_page(page: Any, page_num: int) -> str:
+    """Extract one pdfplumber page, rendering its tables before the layout text."""
+    # Collect pieces and join once; += on the page string is quadratic in table rows
+    parts = []
+    
+    # Extract tables first; the default "lines" strategy needs ruling edges, so
+    # pages without any are text-only
+    tables = page.extract_tables() if page.edges else []
+    if tables:
+        logger.info(f"Found {len(tables)} tables on page {page_num + 1}")
+        _render_tables(parts, tables)
+    
+    # Extract regular text. The layout-preserving pass is expensive, so it is only
+    # used to keep text aligned around tables; text-only pages take the fast path.
+    regular_text = None
+    if tables:
+        try:
+            regular_text = page.extract_text(layout=True, x_tolerance=1)
+        except Exception:
+            regular_text = None
+    if regular_text is None:
+        # Fallback to basic text extraction
+        regular_text = page.extract_text()
+    if regular_text:
+        parts.append(regular_text)
+    
+    return "".join(parts)
+
+
+def _extract_pdfplumber_pages(pdf: Any, first_page: int, last_page: int) -> List[str]:
+    """Extract pages [first_page, last_page) of an open PDF, dropping blank pages."""
+    page_texts = []
+    for page_num in range(first_page, last_page):
+        page_text = _extract_pdfplumber_page(pdf.pages[page_num], page_num)
+        if page_text and not page_text.isspace():
+            page_texts.append(page_text)
+    return page_texts
+
+
+def _extract_pdf_page_range(file_path: str, first_page: int, last_page: int) -> List[str]:
+    """Open a PDF and extract a page range; module-level so worker processes can run it."""
+    if fitz:
+        with fitz.open(file_path) as document:
+            return _extract_fitz_pages(document, first_page, last_page)
+    with pdfplumber.open(file_path) as pdf:
+        return _extract_pdfplumber_pages(pdf, first_page, last_page)
 
 
 # Utility function for processing sample documents
 def process_sample_documents() -> List[Dict[str, Any]]:
-    """Process sample documents and return chunks."""
-    processor = DocumentProcessor()
+    """Process sample documents and return chunks.
+    
+    Large sample sets are processed by a pool of spawned worker processes,
+    one file per task, since PDF extraction is CPU-bound. Smaller sets are
+    processed in-process, where worker start-up would outweigh the work.
+    """
     all_chunks = []
     
     sample_dir = "data/sample_contracts"
@@ -428,35 +911,82 @@ def process_sample_documents() -> List[Dict[str, Any]]:
         logger.warning(f"Sample directory '{sample_dir}' not found")
         return []
     
-    for filename in os.listdir(sample_dir):
-        if filename.endswith(('.txt', '.pdf')):
-            file_path = os.path.join(sample_dir, filename)
-            
-            # Determine document type and metadata based on filename
-            if 'contract' in filename.lower():
-                doc_metadata = {
-                    "document_type": "contract",
-                    "partner_name": "Sushi Express 24/7",
-                    "title": "Partnership Agreement"
-                }
-            elif 'payout' in filename.lower():
-                doc_metadata = {
-                    "document_type": "payout_report",
-                    "partner_name": "Sushi Express 24/7",
-                    "title": "Payout Statement"
-                }
-            else:
-                doc_metadata = {
-                    "document_type": "general",
-                    "title": filename
-                }
-            
-            try:
-                chunks = processor.process_file(file_path, doc_metadata)
-                all_chunks.extend(chunks)
-                logger.info(f"Processed '{filename}': {len(chunks)} chunks")
-            except Exception as e:
-                logger.error(f"Failed to process '{filename}': {e}")
-                continue
+    # scandir yields the stat results with the listing; smallest files first so
+    # the first chunks are available quickly
+    with os.scandir(sample_dir) as entries:
+        sample_files = [
+            (entry.path, entry.stat()) for entry in entries
+            if entry.name.lower().endswith(('.txt', '.pdf')) and entry.is_file()
+        ]
+    sample_files.sort(key=lambda item: item[1].st_size)
+    file_paths = [file_path for file_path, _ in sample_files]
+    file_stats = [file_stat for _, file_stat in sample_files]
     
+    total_bytes = sum(file_stat.st_size for file_stat in file_stats)
+    workers = min(len(sample_files), os.cpu_count() or 1) if total_bytes >= PARALLEL_MIN_BYTES else 1
+    results = None
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_POOL_CONTEXT) as executor:
+                results = list(executor.map(_process_sample_file, file_paths, file_stats))
+        except (OSError, RuntimeError) as e:
+            # Process pools are unavailable in some sandboxes; process in-process instead
+            logger.warning(f"Parallel sample processing unavailable, falling back to sequential: {e}")
+    if results is None:
+        processor = DocumentProcessor()
+        # Batch run handling one file at a time; large PDFs may fan out by page
+        processor.parallel_pdf_pages = True
+        results = [
+            _process_sample_file(file_path, file_stat, processor)
+            for file_path, file_stat in sample_files
+        ]
+    
+    for file_path, chunks, error in results:
+        filename = os.path.basename(file_path)
+        if error:
+            logger.error(f"Failed to process '{filename}': {error}")
+            continue
+        all_chunks.extend(chunks)
+        logger.info(f"Processed '{filename}': {len(chunks)} chunks")
+
     return all_chunks
+
+
+def _process_sample_file(file_path: str, file_stat: os.stat_result,
+                         processor: Optional[DocumentProcessor] = None
+                         ) -> Tuple[str, List[Dict[str, Any]], Optional[str]]:
+    """Chunk one sample file; module-level so worker processes can run it.
+    
+    Returns:
+        Tuple of (file_path, chunks, error message or None).
+    """
+    if processor is None:
+        # This process already handles a whole document, so pages stay in-process
+        processor = DocumentProcessor()
+    
+    filename = os.path.basename(file_path)
+    lower_name = filename.lower()
+    
+    # Determine document type and metadata based on filename
+    if 'contract' in lower_name:
+        doc_metadata = {
+            "document_type": "contract",
+            "partner_name": "Sushi Express 24/7",
+            "title": "Partnership Agreement"
+        }
+    elif 'payout' in lower_name:
+        doc_metadata = {
+            "document_type": "payout_report",
+            "partner_name": "Sushi Express 24/7",
+            "title": "Payout Statement"
+        }
+    else:
+        doc_metadata = {
+            "document_type": "general",
+            "title": filename
+        }
+    
+    try:
+        return file_path, processor.process_file(file_path, doc_metadata, file_stat), None
+    except Exception as e:
+        return file_path, [], str(e)
@@ -1,12 +1,13 @@
 """OpenAI embedding service for document vectorization and semantic search.
 
-Provides text embedding generation using OpenAI's Ada-002 model with batch processing,
+Provides text embedding generation using OpenAI's text-embedding-3 models with batch processing,
 rate limiting, and similarity calculations for financial document analysis.
 
 Key Features:
     - Text-to-vector embedding generation
-    - Batch processing with rate limiting
-    - Cosine similarity calculations
+    - Concurrent batch processing with backoff on transient API errors
+    - Cosine similarity calculations (NumPy/BLAS; SimSIMD or Numba kernels for arrays)
+    - Persistent embedding cache keyed by text hash and model
     - Document chunk enhancement
 
 Example:
@@ -14,68 +15,274 @@ Example:
     service = EmbeddingService()
     embedding = service.generate_embedding("Contract terms")
     similarity = service.calculate_similarity(emb1, emb2)
+    scores = service.calculate_similarity_matrix([query_emb], chunk_embs)
     ```
 """
+import functools
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import math
+import os
+import sqlite3
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Coroutine, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
 import asyncio
-from openai import OpenAI
+
+import httpx
+import numpy as np
+import tiktoken
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, OpenAI, RateLimitError
 from openai.types import CreateEmbeddingResponse
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+try:
+    import h2  # installed by httpx[http2]; enables HTTP/2 multiplexing
+except ImportError:
+    h2 = None
+
+try:
+    import simsimd  # optional: SIMD cosine kernels for float32/float16 arrays
+except ImportError:
+    simsimd = None
+
+try:
+    # Optional JIT for the single-pair cosine kernel; NumPy is used otherwise
+    from numba import njit
+except ImportError:
+    njit = None
 
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Float widths chunk embeddings may be held in; the OpenSearch field is float32
+_EMBEDDING_STORAGE_DTYPES = ("float16", "float32", "float64")
+# Largest int8 code; each quantized row's largest component maps to it
+_INT8_SCALE = 127
+
+# Rate limits, timeouts, dropped connections and 5xx responses are retried;
+# anything else (e.g. 400 for a bad input) fails the batch immediately
+_TRANSIENT_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+# Attempts per batch on transient errors before the batch is given up
+_RETRY_MAX_ATTEMPTS = 6
+# Upper bound for a single backoff wait, in seconds
+_RETRY_MAX_WAIT = 60.0
+
+# Single-text embeddings (e.g. search queries) memoized per service
+_EMBEDDING_MEMO_SIZE = 4096
+
+# Seconds between status checks of an offline Batch API job
+_OFFLINE_POLL_INTERVAL = 30.0
+# Batch API job states after which no results will follow
+_OFFLINE_FINAL_STATES = ("completed", "failed", "expired", "cancelled")
+
+# Hashes per SELECT; stays below SQLite's bound-parameter limit
+_CACHE_LOOKUP_CHUNK = 500
+
+# Per-request timeout in seconds; the SDK default allows 10 minutes per read
+_OPENAI_TIMEOUT = 60.0
+
+_T = TypeVar("_T")
+
+# Event loop on a daemon thread that runs every async embedding request, started on first use
+_request_loop: Optional[asyncio.AbstractEventLoop] = None
+_request_loop_lock = threading.Lock()
+
+# Pooled OpenAI clients by (API key, pool size), shared by all services
+_clients_by_key: Dict[Tuple[str, int], Tuple[OpenAI, AsyncOpenAI]] = {}
+_shared_clients_lock = threading.Lock()
+
+
+class _RequestPacer:
+    """Spaces request starts evenly to stay under a requests-per-minute budget.
+    
+    Throttles before requests are sent instead of waiting for 429 responses;
+    used only on the request loop, so no lock is needed.
+    """
+    
+    def __init__(self, requests_per_minute: int):
+        self.interval = 60.0 / requests_per_minute
+        self._next_start = 0.0
+    
+    async def wait(self) -> None:
+        """Wait for this request's start slot."""
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start)
+        self._next_start = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class EmbeddingCache:
+    """SQLite store of embeddings keyed by SHA-256 of the text and the model name.
+    
+    Vectors are stored as float32 bytes, the precision the API returns them
+    in. Failures are logged and only cost a cache miss.
+    """
+    
+    def __init__(self, path: str):
+        """Open (lazily) the cache database at ``path``."""
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        # Used from the caller's thread and the request loop thread
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Cache key for a text."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached embeddings among ``hashes``."""
+        found: Dict[str, List[float]] = {}
+        try:
+            with self._lock:
+                connection = self._connect()
+                for i in range(0, len(hashes), _CACHE_LOOKUP_CHUNK):
+                    chunk = hashes[i:i + _CACHE_LOOKUP_CHUNK]
+                    rows = connection.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                        f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                        (model, *chunk)
+                    )
+                    for text_hash, vector in rows:
+                        found[text_hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+        return found
+    
+    def put_many(self, model: str, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        """Store ``(text_hash, embedding)`` pairs, replacing existing entries."""
+        rows = [
+            (model, text_hash, np.asarray(embedding, dtype=np.float32).tobytes())
+            for text_hash, embedding in items
+        ]
+        if not rows:
+            return
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                        rows
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use; caller holds the lock."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            # WAL lets several API workers read while one writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+            )
+            self._connection = connection
+        return self._connection
+    
+    def close(self) -> None:
+        """Close the database connection; it is reopened on next use."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
 
 class EmbeddingService:
     """OpenAI embedding service for document vectorization and semantic analysis.
     
-    Generates text embeddings using Ada-002 model with batch processing, rate limiting,
+    Generates text embeddings using text-embedding-3-small with batch processing, rate limiting,
     and similarity calculations for financial document analysis.
     
     Features:
         - Single and batch embedding generation
-        - Automatic text truncation and rate limiting
+        - Exact token-count truncation (tiktoken) and transient-error backoff
+        - Concurrent batch requests (sync and async APIs)
+        - Discounted offline Batch API jobs for bulk re-indexing
         - Cosine similarity calculations
         - Document chunk enhancement
     
     Attributes:
         client: OpenAI API client
-        model: Ada-002 embedding model
+        aclient: Async OpenAI API client used for batch requests
+        model: Embedding model (text-embedding-3-small)
+        dimensions: Requested embedding size (512), or None for the model's full size
         max_tokens: Token limit (8,191)
-        batch_size: Documents per batch (100)
-        rate_limit_delay: Delay between batches (1.0s)
+        batch_size: Maximum documents per batch (100)
+        batch_token_budget: Maximum total tokens per batch (250,000)
+        max_concurrency: Batch requests in flight at once
+        request_pacer: Proactive requests-per-minute limiter, or None
+        rate_limit_delay: Backoff scale after a transient API error (1.0s)
+        cache: Persistent embedding cache, or None when caching is disabled
+        storage_dtype: NumPy dtype for chunk embeddings, or None for lists
+        store_int8: Chunks also carry int8 codes and their per-vector scale
     """
     
     def __init__(self):
         """Initialize embedding service with OpenAI client and configuration.
         
-        Sets up Ada-002 model, batch processing, and rate limiting parameters.
+        Sets up the embedding model, batch processing, and rate limiting parameters.
         
         Raises:
-            ValueError: When OpenAI API key is not configured.
+            ValueError: When OpenAI API key is not configured, dimensions are
+                requested for a model that cannot shorten its embeddings, or
+                the embedding storage dtype is not a supported float type.
         """
         if not settings.openai_api_key:
             raise ValueError("OpenAI API key is required. Please set OPENAI_API_KEY in your environment.")
         
-        self.client = OpenAI(api_key=settings.openai_api_key)
-        self.model = "text-embedding-ada-002"  # OpenAI's best embedding model
-        self.max_tokens = 8191  # Max tokens for ada-002
-        self.batch_size = 100  # Process embeddings in batches
-        self.rate_limit_delay = 1.0  # Delay between API calls to avoid rate limits
+        self.max_concurrency = max(1, settings.embedding_max_concurrency)
+        # Shared process-wide, so services created per request or per task
+        # reuse warm connections instead of opening their own pools
+        self.client, self.aclient = _shared_clients(settings.openai_api_key, self.max_concurrency)
+        self.model = settings.embedding_model
+        self.dimensions = settings.embedding_dimensions or None
+        if self.dimensions and not self.model.startswith("text-embedding-3"):
+            raise ValueError(f"Embedding model {self.model} does not support shortened dimensions")
+        # The API returns shortened text-embedding-3 vectors already unit length
+        self._request_options = {"dimensions": self.dimensions} if self.dimensions else {}
+        # Vectors of different sizes must not share cache entries
+        self._cache_model = f"{self.model}:{self.dimensions}" if self.dimensions else self.model
+        self.max_tokens = 8191  # Max input tokens for OpenAI embedding models
+        self.batch_size = max(1, settings.embedding_batch_max_items)
+        # Stays under the endpoint's per-request token cap
+        self.batch_token_budget = max(self.max_tokens, settings.embedding_batch_token_budget)
+        self.rate_limit_delay = 1.0  # Backoff scale after a transient API error
+        self.request_pacer = (
+            _RequestPacer(settings.embedding_requests_per_minute)
+            if settings.embedding_requests_per_minute > 0 else None
+        )
+        self.storage_dtype = _storage_dtype(settings.embedding_storage_dtype)
+        self.store_int8 = settings.embedding_int8
+        self.cache = (
+            EmbeddingCache(os.path.join(settings.document_cache_dir, "embeddings.sqlite3"))
+            if settings.document_cache_dir else None
+        )
+        # Per instance, so the memo is dropped together with the service
+        self._embed_text = functools.lru_cache(maxsize=_EMBEDDING_MEMO_SIZE)(self._request_embedding)
     
     def generate_embedding(self, text: str) -> List[float]:
-        """Generate semantic embedding vector for text using Ada-002 model.
+        """Generate semantic embedding vector for text.
         
-        Transforms text into 1536-dimensional vector with automatic truncation
-        and validation.
+        Transforms text into a unit-length vector with automatic truncation
+        and validation. Repeated texts, such as recurring search queries, are
+        answered from an in-memory LRU memo, then from the persistent embedding
+        cache, before the API is called.
         
         Args:
             text: Input text content for embedding generation.
         
         Returns:
-            1536-dimensional embedding vector as list of floats.
+            Embedding vector (``dimensions`` floats) as list of floats.
         
         Raises:
             ValueError: When text is empty or embedding generation fails.
@@ -87,28 +294,51 @@ class EmbeddingService:
         # Truncate text if too long
         text = self._truncate_text(text)
         
+        # Memoized as a tuple; callers get their own list
+        return list(self._embed_text(text))
+    
+    def _request_embedding(self, text: str) -> Tuple[float, ...]:
+        """Embed one text from the persistent cache or the API.
+        
+        Errors propagate, so failures are never memoized.
+        """
+        text_hash = EmbeddingCache.text_hash(text) if self.cache is not None else None
+        if text_hash is not None:
+            cached = self.cache.get_many(self._cache_model, [text_hash]).get(text_hash)
+            if cached:
+                return tuple(cached)
+        
         try:
             response = self.client.embeddings.create(
                 model=self.model,
-                input=text
+                input=text,
+                **self._request_options
             )
             
             embedding = response.data[0].embedding
             logger.debug(f"Generated embedding with {len(embedding)} dimensions")
-            return embedding
             
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise ValueError(f"Embedding generation failed: {e}")
+        
+        if text_hash is not None:
+            self.cache.put_many(self._cache_model, [(text_hash, embedding)])
+        return tuple(embedding)
     
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts using batch processing.
         
+        Texts already in the embedding cache are not sent again, and repeated
+        texts (e.g. boilerplate clauses) are sent once. The rest are sent in
+        batches, concurrently (up to ``max_concurrency`` at a time) instead
+        of one after another with a fixed sleep in between.
+        
         Args:
             texts (List[str]): List of text strings for embedding generation.
         
         Returns:
-            List[List[float]]: List of 1536-dimensional embedding vectors.
+            List[List[float]]: List of embedding vectors.
                 Failed embeddings are represented as empty lists.
         
         Raises:
@@ -121,116 +351,446 @@ class EmbeddingService:
             embeddings = service.generate_embeddings_batch(texts)
             ```
         """
-        if not texts:
-            return []
+        valid_texts, token_counts = self._prepare_texts(texts)
+        embeddings, missing, hashes = self._cached_embeddings(valid_texts)
+        if missing:
+            batches, positions = self._plan_requests(
+                [valid_texts[i] for i in missing], [token_counts[i] for i in missing]
+            )
+            futures = self._submit_batches(batches)
+            fresh = self._collect_batches([future.result() for future in futures])
+            self._fill_missing(embeddings, missing, [fresh[p] for p in positions], hashes)
+        return embeddings
+    
+    async def generate_embeddings_batch_async(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of :meth:`generate_embeddings_batch`.
+        
+        Args:
+            texts (List[str]): List of text strings for embedding generation.
+        
+        Returns:
+            List[List[float]]: Embedding vectors in input order; failed
+                embeddings are represented as empty lists.
+        """
+        valid_texts, token_counts = self._prepare_texts(texts)
+        embeddings, missing, hashes = self._cached_embeddings(valid_texts)
+        if missing:
+            batches, positions = self._plan_requests(
+                [valid_texts[i] for i in missing], [token_counts[i] for i in missing]
+            )
+            futures = self._submit_batches(batches)
+            fresh = self._collect_batches(await asyncio.gather(*map(asyncio.wrap_future, futures)))
+            self._fill_missing(embeddings, missing, [fresh[p] for p in positions], hashes)
+        return embeddings
+    
+    def generate_embeddings_batch_offline(self, texts: List[str],
+                                          poll_interval: float = _OFFLINE_POLL_INTERVAL) -> List[List[float]]:
+        """Generate embeddings through the OpenAI Batch API at half the token price.
+        
+        Meant for bulk re-indexing (initial ingest, model migrations) where
+        latency does not matter: uncached texts are packed into the same
+        batches as the realtime path, uploaded as one JSONL job and collected
+        once OpenAI completes it (within 24 hours). Blocks until then;
+        interactive paths should keep using :meth:`generate_embeddings_batch`.
+        
+        Args:
+            texts (List[str]): List of text strings for embedding generation.
+            poll_interval (float): Seconds between job status checks.
+        
+        Returns:
+            List[List[float]]: Embedding vectors in input order; texts whose
+                job or request failed are represented as empty lists.
+        """
+        valid_texts, token_counts = self._prepare_texts(texts)
+        embeddings, missing, hashes = self._cached_embeddings(valid_texts)
+        if missing:
+            batches, positions = self._plan_requests(
+                [valid_texts[i] for i in missing], [token_counts[i] for i in missing]
+            )
+            fresh = self._run_offline_job(list(batches), poll_interval)
+            self._fill_missing(embeddings, missing, [fresh[p] for p in positions], hashes)
+        return embeddings
+    
+    def _run_offline_job(self, batches: List[List[str]], poll_interval: float) -> List[List[float]]:
+        """Submit batches as one Batch API job and return their embeddings in order."""
+        requests = [
+            json.dumps({
+                "custom_id": str(number),
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {"model": self.model, "input": batch, **self._request_options}
+            })
+            for number, batch in enumerate(batches)
+        ]
+        results: Dict[int, List[List[float]]] = {}
         
+        try:
+            input_file = self.client.files.create(
+                file=("embeddings.jsonl", "\n".join(requests).encode("utf-8")),
+                purpose="batch"
+            )
+            job = self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/embeddings",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted offline embedding job {job.id} with {len(batches)} requests")
+            
+            while job.status not in _OFFLINE_FINAL_STATES:
+                time.sleep(poll_interval)
+                job = self.client.batches.retrieve(job.id)
+            
+            if job.status != "completed" or not job.output_file_id:
+                logger.error(f"Offline embedding job {job.id} ended as {job.status}")
+            else:
+                for line in self.client.files.content(job.output_file_id).text.splitlines():
+                    if not line.strip():
+                        continue
+                    result = json.loads(line)
+                    response = result.get("response") or {}
+                    if response.get("status_code") != 200:
+                        logger.error(f"Offline embedding request {result.get('custom_id')} failed: "
+                                     f"{result.get('error') or response.get('body')}")
+                        continue
+                    data = sorted(response["body"]["data"], key=lambda item: item["index"])
+                    results[int(result["custom_id"])] = [item["embedding"] for item in data]
+        except Exception as e:
+            logger.error(f"Offline embedding job failed: {e}")
+        
+        return [
+            embedding
+            for number, batch in enumerate(batches)
+            for embedding in results.get(number, [[] for _ in batch])
+        ]
+    
+    def _prepare_texts(self, texts: List[str]) -> Tuple[List[str], List[Optional[int]]]:
+        """Drop empty texts and truncate the rest.
+        
+        Returns:
+            Tuple of (truncated texts, their token counts where truncation
+            already encoded them, else None).
+        """
         # Remove empty texts and truncate
         valid_texts = []
-        for text in texts:
+        token_counts = []
+        for text in texts or ():
             if text.strip():
-                valid_texts.append(self._truncate_text(text))
+                truncated, n_tokens = self._truncate_and_count(text)
+                valid_texts.append(truncated)
+                token_counts.append(n_tokens)
+        return valid_texts, token_counts
+    
+    def _plan_requests(self, texts: List[str], token_counts: Optional[List[Optional[int]]] = None
+                       ) -> Tuple[Iterator[List[str]], List[int]]:
+        """Plan API batches for texts that need embedding.
         
-        if not valid_texts:
-            return []
+        Repeated texts are sent once, and texts are sorted by length before
+        packing so each batch holds similar sizes: requests are not held up
+        by one long clause among short ones, and token-budget packing fills
+        batches more evenly.
         
-        embeddings = []
+        Args:
+            texts: Texts to embed.
+            token_counts: Known token count per text (None where unknown), so
+                texts already encoded by truncation are not encoded again.
         
-        # Process in batches to avoid rate limits
-        for i in range(0, len(valid_texts), self.batch_size):
-            batch = valid_texts[i:i + self.batch_size]
-            
+        Returns:
+            Tuple of (lazily packed batches, position of each input text in
+            the flattened batch results).
+        """
+        unique_texts, unique_positions = _dedupe(texts)
+        unique_counts: List[Optional[int]] = [None] * len(unique_texts)
+        if token_counts is not None:
+            for position, n_tokens in zip(unique_positions, token_counts):
+                if unique_counts[position] is None:
+                    unique_counts[position] = n_tokens
+        # Stable, so equal lengths keep their input order
+        order = sorted(range(len(unique_texts)), key=lambda i: len(unique_texts[i]))
+        rank = [0] * len(order)
+        for sorted_position, i in enumerate(order):
+            rank[i] = sorted_position
+        batches = self._iter_batches([unique_texts[i] for i in order], [unique_counts[i] for i in order])
+        return batches, [rank[p] for p in unique_positions]
+    
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into API batches.
+        
+        Texts are packed greedily until a batch holds ``batch_size`` texts or
+        the next text would push it past ``batch_token_budget`` tokens, so
+        short chunks fill a request and long clauses never exceed the cap.
+        """
+        return list(self._iter_batches(texts))
+    
+    def _iter_batches(self, texts: List[str],
+                      token_counts: Optional[List[Optional[int]]] = None) -> Iterator[List[str]]:
+        """Yield the batches of :meth:`_batches` as each one is packed.
+        
+        Texts are only encoded here when ``token_counts`` has no count for them.
+        """
+        if token_counts is None:
+            token_counts = [None] * len(texts)
+        batch: List[str] = []
+        batch_tokens = 0
+        for text, n_tokens in zip(texts, token_counts):
+            if n_tokens is None:
+                n_tokens = self._count_tokens(text)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + n_tokens > self.batch_token_budget):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += n_tokens
+        if batch:
+            yield batch
+    
+    def _cached_embeddings(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int], List[str]]:
+        """Look texts up in the embedding cache.
+        
+        Returns:
+            Tuple of (embeddings with None for misses, indices of the misses,
+            text hashes; empty when caching is disabled).
+        """
+        if self.cache is None:
+            return [None] * len(texts), list(range(len(texts))), []
+        
+        hashes = [EmbeddingCache.text_hash(text) for text in texts]
+        cached = self.cache.get_many(self._cache_model, list(set(hashes)))
+        embeddings = [cached.get(text_hash) for text_hash in hashes]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if cached:
+            logger.info(f"Embedding cache hit for {len(texts) - len(missing)}/{len(texts)} texts")
+        return embeddings, missing, hashes
+    
+    def _fill_missing(self, embeddings: List[Optional[List[float]]], missing: List[int],
+                      fresh: List[List[float]], hashes: List[str]) -> None:
+        """Slot freshly generated embeddings into place and cache the successful ones."""
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+        if self.cache is not None:
+            self.cache.put_many(self._cache_model, [(hashes[i], embeddings[i]) for i in missing if embeddings[i]])
+    
+    def _submit_batches(self, batches: Iterable[List[str]]) -> List["Future[List[List[float]]]"]:
+        """Schedule each batch on the request loop as soon as it is packed.
+        
+        Requests run concurrently (up to ``max_concurrency`` at a time) on the
+        request loop's thread, so token counting for the next batch overlaps
+        the network wait of the ones already sent.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return [
+            _run_in_request_loop(self._embed_batch(self.aclient, semaphore, batch, number))
+            for number, batch in enumerate(batches, start=1)
+        ]
+    
+    def _collect_batches(self, results: List[List[List[float]]]) -> List[List[float]]:
+        """Flatten per-batch results, keeping them in input order."""
+        embeddings = [embedding for batch_embeddings in results for embedding in batch_embeddings]
+        logger.info(f"Generated embeddings for {len(embeddings)} texts")
+        return embeddings
+    
+    async def _embed_batch(self, client: AsyncOpenAI, semaphore: asyncio.Semaphore,
+                           batch: List[str], number: int) -> List[List[float]]:
+        """Embed one batch, retrying transient errors with jittered exponential backoff."""
+        def log_retry(retry_state: RetryCallState) -> None:
+            logger.warning(
+                f"Retrying batch {number} (attempt {retry_state.attempt_number}) after "
+                f"{retry_state.outcome.exception()!r}"
+            )
+        
+        async with semaphore:
             try:
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                # Extract embeddings from response
-                batch_embeddings = [item.embedding for item in response.data]
-                embeddings.extend(batch_embeddings)
-                
-                logger.info(f"Generated embeddings for batch {i//self.batch_size + 1}: {len(batch)} texts")
-                
-                # Rate limiting delay
-                if i + self.batch_size < len(valid_texts):
-                    time.sleep(self.rate_limit_delay)
-                    
+                # Random jitter keeps concurrent batches from retrying in lockstep
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+                    wait=wait_random_exponential(multiplier=self.rate_limit_delay, max=_RETRY_MAX_WAIT),
+                    stop=stop_after_attempt(_RETRY_MAX_ATTEMPTS),
+                    before_sleep=log_retry,
+                    reraise=True,
+                ):
+                    with attempt:
+                        if self.request_pacer is not None:
+                            await self.request_pacer.wait()
+                        response = await client.embeddings.create(
+                            model=self.model,
+                            input=batch,
+                            **self._request_options
+                        )
             except Exception as e:
-                logger.error(f"Failed to generate embeddings for batch starting at index {i}: {e}")
+                logger.error(f"Failed to generate embeddings for batch {number}: {e}")
                 # Add empty embeddings for failed batch
-                embeddings.extend([[] for _ in batch])
-                continue
+                return [[] for _ in batch]
         
-        logger.info(f"Generated embeddings for {len(embeddings)} texts")
-        return embeddings
+        logger.info(f"Generated embeddings for batch {number}: {len(batch)} texts")
+        return [item.embedding for item in response.data]
     
-    def add_embeddings_to_chunks(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def add_embeddings_to_chunks(self, chunks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Add embeddings to document chunks.
         
         Args:
-            chunks: List of document chunks
+            chunks: Document chunks (any iterable)
             
         Returns:
             Chunks with embeddings added
         """
-        if not chunks:
-            return []
+        return list(self.iter_chunks_with_embeddings(chunks))
+    
+    def iter_chunks_with_embeddings(self, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Stream document chunks with embeddings added.
+        
+        Chunks are pulled from the iterable in groups that fill
+        ``max_concurrency`` API batches, so memory stays bounded by two groups
+        while the batches within a group are still sent concurrently. The next
+        group is embedded on a worker thread while the current one is being
+        chunked and consumed, which keeps truncation, cache lookups and
+        requests off the caller's critical path.
+        
+        Args:
+            chunks: Document chunks, e.g. ``DocumentProcessor.iter_chunks()``
+            
+        Yields:
+            Copies of the chunks with embeddings added
+        """
+        chunks = iter(chunks)
+        group_size = self.batch_size * self.max_concurrency
+        offset = 0
+        
+        group = list(islice(chunks, group_size))
+        if not group:
+            return
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(self._embed_group, group)
+            while group:
+                embeddings, quantized = pending.result()
+                
+                # Prefetch: start the next group before handing out this one
+                next_group = list(islice(chunks, group_size))
+                if next_group:
+                    pending = executor.submit(self._embed_group, next_group)
+                
+                # Add embeddings to chunks
+                for i, chunk in enumerate(group):
+                    yield self._with_embedding(chunk, embeddings[i] if i < len(embeddings) else None, offset + i,
+                                               quantized[i] if quantized and i < len(quantized) else None)
+                offset += len(group)
+                group = next_group
+    
+    def _embed_group(self, group: List[Dict[str, Any]]
+                     ) -> Tuple[List[Union[List[float], np.ndarray]], Optional[List[Optional[Tuple[np.ndarray, float]]]]]:
+        """Generate (and optionally pack and quantize) the embeddings of one group of chunks.
         
+        Returns:
+            The group's embeddings, and per chunk its int8 codes and scale
+            (None for failed embeddings), or None when int8 storage is off.
+        """
         # Extract texts for embedding generation
-        texts = [chunk.get('content', '') for chunk in chunks]
+        texts = [chunk.get('content', '') for chunk in group]
         
-        # Generate embeddings
         embeddings = self.generate_embeddings_batch(texts)
+        if self.storage_dtype is not None:
+            embeddings = _pack_embeddings(embeddings, self.storage_dtype)
+        if not self.store_int8:
+            return embeddings, None
         
-        # Add embeddings to chunks
-        updated_chunks = []
-        for i, chunk in enumerate(chunks):
-            updated_chunk = chunk.copy()
-            
-            if i < len(embeddings) and embeddings[i]:
-                updated_chunk['embedding'] = embeddings[i]
-                updated_chunk['embedding_model'] = self.model
-                updated_chunk['embedding_dimensions'] = len(embeddings[i])
-            else:
-                logger.warning(f"No embedding generated for chunk {i}")
-                updated_chunk['embedding'] = []
-                updated_chunk['embedding_model'] = None
-                updated_chunk['embedding_dimensions'] = 0
-            
-            updated_chunks.append(updated_chunk)
+        # One vectorized pass over the group's filled rows
+        quantized = [None] * len(embeddings)
+        filled = [i for i, embedding in enumerate(embeddings) if len(embedding)]
+        if filled:
+            codes, scales = self.quantize_embeddings([embeddings[i] for i in filled])
+            for row, i in enumerate(filled):
+                quantized[i] = (codes[row], float(scales[row]))
+        return embeddings, quantized
+    
+    def _with_embedding(self, chunk: Dict[str, Any], embedding: Union[List[float], np.ndarray, None],
+                        index: int, quantized: Optional[Tuple[np.ndarray, float]] = None) -> Dict[str, Any]:
+        """Return a copy of the chunk carrying its embedding fields."""
+        updated_chunk = chunk.copy()
+        
+        # len() rather than truthiness so NumPy rows are accepted too
+        if embedding is not None and len(embedding):
+            updated_chunk['embedding'] = embedding
+            updated_chunk['embedding_model'] = self.model
+            updated_chunk['embedding_dimensions'] = len(embedding)
+            if quantized is not None:
+                updated_chunk['embedding_i8'], updated_chunk['embedding_scale'] = quantized
+        else:
+            logger.warning(f"No embedding generated for chunk {index}")
+            updated_chunk['embedding'] = []
+            updated_chunk['embedding_model'] = None
+            updated_chunk['embedding_dimensions'] = 0
         
-        return updated_chunks
+        return updated_chunk
     
     def _truncate_text(self, text: str) -> str:
+        """Truncate text to at most ``max_tokens`` tokens.
+        
+        Counts tokens with the model's tiktoken encoding, so contract text is
+        cut at the real limit rather than a conservative character estimate.
+        Falls back to the ~4 characters per token heuristic when the encoding
+        cannot be loaded (tiktoken downloads it on first use).
         """
-        Truncate text to fit within token limits.
+        return self._truncate_and_count(text)[0]
+    
+    def _truncate_and_count(self, text: str) -> Tuple[str, Optional[int]]:
+        """Truncate text like :meth:`_truncate_text`, also returning its token count.
         
-        Note: This is a simple character-based truncation.
-        For production, consider using tiktoken for accurate token counting.
+        The count is None when the text was not encoded (short ASCII text, or
+        no encoding available); a truncated text counts as ``max_tokens``.
         """
-        # Rough estimate: 1 token ≈ 4 characters
+        # A token spans at least one character, so short ASCII text always fits
+        if len(text) <= self.max_tokens and text.isascii():
+            return text, None
+        
+        encoding = _token_encoding(self.model)
+        if encoding is None:
+            return self._truncate_text_by_chars(text), None
+        
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= self.max_tokens:
+            return text, len(tokens)
+        
+        truncated = encoding.decode(tokens[:self.max_tokens])
+        logger.warning(f"Text truncated from {len(tokens)} to {self.max_tokens} tokens")
+        return truncated, self.max_tokens
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens in text, estimating ~4 characters per token without an encoding."""
+        encoding = _token_encoding(self.model)
+        if encoding is None:
+            return len(text) // 4 + 1
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _truncate_text_by_chars(self, text: str) -> str:
+        """Truncate text using the rough 1 token ≈ 4 characters estimate."""
         max_chars = self.max_tokens * 4
         
         if len(text) <= max_chars:
             return text
         
-        # Truncate and try to end at word boundary
-        truncated = text[:max_chars]
-        last_space = truncated.rfind(' ')
-        
-        if last_space > max_chars * 0.8:  # If we find a space in the last 20%
-            truncated = truncated[:last_space]
+        # End at a word boundary if there is a space in the last 20%; searching
+        # only that window of the original avoids slicing a copy first
+        last_space = text.rfind(' ', math.floor(max_chars * 0.8) + 1, max_chars)
+        truncated = text[:last_space if last_space != -1 else max_chars]
         
         logger.warning(f"Text truncated from {len(text)} to {len(truncated)} characters")
         return truncated
     
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+    def calculate_similarity(self, embedding1: Union[Sequence[float], np.ndarray],
+                             embedding2: Union[Sequence[float], np.ndarray],
+                             normalized: bool = False) -> float:
         """Calculate cosine similarity between two embedding vectors.
         
+        Two float32 or float16 arrays (see ``EMBEDDING_STORAGE_DTYPE``), or
+        two int8 rows from :meth:`quantize_embeddings`, are scored by SimSIMD's
+        SIMD kernels when the package is installed; otherwise float arrays use
+        a Numba-compiled kernel when numba is installed.
+        
         Args:
-            embedding1 (List[float]): First embedding vector.
-            embedding2 (List[float]): Second embedding vector.
+            embedding1 (Sequence[float] | np.ndarray): First embedding vector.
+            embedding2 (Sequence[float] | np.ndarray): Second embedding vector.
+            normalized (bool): Both vectors are unit length, as OpenAI
+                embeddings are, so cosine similarity is their dot product.
         
         Returns:
             float: Cosine similarity score between -1.0 and 1.0, where
@@ -244,25 +804,185 @@ class EmbeddingService:
             similarity = service.calculate_similarity(emb1, emb2)
             ```
         """
-        if not embedding1 or not embedding2:
+        # len() rather than truthiness so NumPy arrays are accepted too
+        if len(embedding1) == 0 or len(embedding2) == 0:
             return 0.0
         
         if len(embedding1) != len(embedding2):
             raise ValueError("Embedding dimensions must match")
         
-        # Calculate dot product
-        dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
+        if simsimd is not None and not normalized and _simsimd_compatible(embedding1, embedding2):
+            # Zero vectors score 0.0, as below
+            if not (embedding1.any() and embedding2.any()):
+                return 0.0
+            return float(1.0 - simsimd.cosine(embedding1, embedding2))
+        
+        if njit is not None and not normalized and _numba_compatible(embedding1, embedding2):
+            # One fused pass without NumPy's per-call overhead or a float64 copy
+            return float(_cosine_kernel(embedding1, embedding2))
+        
+        vector1 = _as_vector(embedding1)
+        vector2 = _as_vector(embedding2)
         
-        # Calculate magnitudes
-        magnitude1 = sum(a * a for a in embedding1) ** 0.5
-        magnitude2 = sum(b * b for b in embedding2) ** 0.5
+        if normalized:
+            # Clip rounding drift (e.g. float16 storage) back into the cosine range
+            return min(max(float(vector1.dot(vector2)), -1.0), 1.0)
+        
+        # Dot product and magnitudes run as BLAS kernels instead of Python loops
+        dot_product = vector1.dot(vector2)
+        magnitude1 = math.sqrt(vector1.dot(vector1))
+        magnitude2 = math.sqrt(vector2.dot(vector2))
         
         if magnitude1 == 0 or magnitude2 == 0:
             return 0.0
         
         # Calculate cosine similarity
         similarity = dot_product / (magnitude1 * magnitude2)
-        return similarity
+        return float(similarity)
+    
+    def calculate_similarity_matrix(self, queries: Union[Sequence[Sequence[float]], np.ndarray],
+                                    documents: Union[Sequence[Sequence[float]], np.ndarray],
+                                    normalized: bool = False) -> np.ndarray:
+        """Calculate cosine similarity between every query and every document.
+        
+        Scores all pairs with one matrix product instead of one
+        :meth:`calculate_similarity` call per pair.
+        
+        Args:
+            queries (Sequence[Sequence[float]] | np.ndarray): Query embeddings, one per row.
+            documents (Sequence[Sequence[float]] | np.ndarray): Document embeddings, one per row.
+            normalized (bool): All rows are unit length, so the scores are the
+                plain matrix product. Implied when both inputs are int8
+                matrices from :meth:`quantize_embeddings`.
+        
+        Returns:
+            np.ndarray: ``(len(queries), len(documents))`` similarity scores;
+                pairs involving a zero vector score 0.0.
+        
+        Raises:
+            ValueError: When embedding dimensions don't match.
+        
+        Example:
+            ```python
+            scores = service.calculate_similarity_matrix([query_emb], chunk_embs)[0]
+            ```
+        """
+        if _is_int8(queries) and _is_int8(documents):
+            # Integer GEMM on the codes; dividing by the code norms cancels
+            # each row's quantization scale
+            query_matrix = np.atleast_2d(queries).astype(np.int32)
+            document_matrix = np.atleast_2d(documents).astype(np.int32)
+            if query_matrix.shape[1] != document_matrix.shape[1]:
+                raise ValueError("Embedding dimensions must match")
+            magnitudes = np.outer(np.sqrt(np.einsum('ij,ij->i', query_matrix, query_matrix)),
+                                  np.sqrt(np.einsum('ij,ij->i', document_matrix, document_matrix)))
+            scores = np.divide(query_matrix @ document_matrix.T, magnitudes,
+                               out=np.zeros(magnitudes.shape), where=magnitudes != 0)
+            return np.clip(scores, -1.0, 1.0, out=scores)
+        
+        query_matrix = _as_matrix(queries)
+        document_matrix = _as_matrix(documents)
+        
+        if query_matrix.shape[1] != document_matrix.shape[1]:
+            raise ValueError("Embedding dimensions must match")
+        
+        scores = query_matrix @ document_matrix.T
+        if normalized:
+            return np.clip(scores, -1.0, 1.0, out=scores)
+        
+        magnitudes = np.outer(np.linalg.norm(query_matrix, axis=1), np.linalg.norm(document_matrix, axis=1))
+        return np.divide(scores, magnitudes, out=np.zeros_like(scores), where=magnitudes != 0)
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections and the embedding cache.
+        
+        The HTTP clients are shared process-wide, so this is meant for
+        shutdown: services already holding them should not be used
+        afterwards, while services created later get fresh clients. The async
+        client is closed on the request loop that owns its connections.
+        """
+        with _shared_clients_lock:
+            for key, clients in list(_clients_by_key.items()):
+                if clients == (self.client, self.aclient):
+                    del _clients_by_key[key]
+        self.client.close()
+        _run_in_request_loop(self.aclient.close()).result()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def rank_embeddings(self, query: Union[Sequence[float], np.ndarray],
+                        documents: Union[Sequence[Sequence[float]], np.ndarray],
+                        top_k: int = 10, normalized: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the documents most similar to a query.
+        
+        Scores all documents with one matrix-vector product and selects the
+        top ``top_k`` with a partial sort, so only the winners are ordered.
+        
+        Args:
+            query (Sequence[float] | np.ndarray): Query embedding.
+            documents (Sequence[Sequence[float]] | np.ndarray): Document embeddings, one per row.
+            top_k (int): Number of documents to return.
+            normalized (bool): All vectors are unit length (see
+                :meth:`calculate_similarity_matrix`).
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Indices of the best documents and
+                their similarity scores, best first.
+        
+        Example:
+            ```python
+            indices, scores = service.rank_embeddings(query_emb, chunk_matrix, top_k=5)
+            ```
+        """
+        # A single vector is scored as a one-row query matrix
+        scores = self.calculate_similarity_matrix(query, documents, normalized=normalized)[0]
+        top_k = min(top_k, len(scores))
+        if top_k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=scores.dtype)
+        
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return best, scores[best]
+    
+    def quantize_embeddings(self, embeddings: Union[Sequence[Sequence[float]], np.ndarray]
+                            ) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantize embeddings to int8 codes with a per-vector scale.
+        
+        Each row is scaled symmetrically so its largest component maps to
+        127, using the full int8 range even though embedding components are
+        small; ``codes * scale`` restores the row up to rounding (see
+        :meth:`dequantize_embeddings`). The codes are a quarter of the float32
+        size, and :meth:`calculate_similarity_matrix` scores two int8
+        matrices with an integer matrix product, where the scales cancel out;
+        scores differ from float cosine by rounding only (a few thousandths
+        for OpenAI embeddings).
+        
+        Args:
+            embeddings (Sequence[Sequence[float]] | np.ndarray): Embeddings,
+                one per row.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: ``int8`` codes with one row per
+                embedding, and the ``float32`` scale of each row (0.0 for
+                zero vectors).
+        """
+        matrix = _as_matrix(embeddings)
+        peaks = np.abs(matrix).max(axis=1, keepdims=True)
+        scaled = np.divide(matrix * _INT8_SCALE, peaks, out=np.zeros_like(matrix), where=peaks != 0)
+        return np.rint(scaled).astype(np.int8), (peaks[:, 0] / _INT8_SCALE).astype(np.float32)
+    
+    def dequantize_embeddings(self, codes: np.ndarray, scales: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+        """Restore float32 embeddings from :meth:`quantize_embeddings` output.
+        
+        Args:
+            codes (np.ndarray): ``int8`` codes, one row per embedding.
+            scales (Sequence[float] | np.ndarray): Scale of each row.
+        
+        Returns:
+            np.ndarray: ``float32`` matrix with one row per embedding.
+        """
+        codes = np.atleast_2d(codes)
+        return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32).reshape(-1, 1)
     
     def test_connection(self) -> bool:
         """
@@ -273,7 +993,9 @@ class EmbeddingService:
         """
         try:
             test_text = "This is a test."
-            embedding = self.generate_embedding(test_text)
+            # Straight to the API; a memoized or cached answer proves nothing
+            response = self.client.embeddings.create(model=self.model, input=test_text, **self._request_options)
+            embedding = response.data[0].embedding
             
             if embedding and len(embedding) > 0:
                 logger.info("OpenAI embedding service connection test successful")
@@ -287,21 +1009,193 @@ class EmbeddingService:
             return False
 
 
+@functools.lru_cache(maxsize=None)
+def _token_encoding(model: str) -> Optional["tiktoken.Encoding"]:
+    """Load the tiktoken encoding for a model once per process; None if unavailable."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding for {model} unavailable, estimating tokens from characters: {e}")
+        return None
+
+
+def _run_in_request_loop(coroutine: Coroutine[Any, Any, _T]) -> "Future[_T]":
+    """Schedule a coroutine on the shared request loop.
+    
+    Pooled connections of an async client belong to the loop that opened
+    them, so a single long-lived loop lets ``aclient`` keep them between
+    calls. Sync callers, including ones inside a running event loop such as
+    async FastAPI routes, wait on the returned future.
+    """
+    global _request_loop
+    with _request_loop_lock:
+        if _request_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="embedding-requests", daemon=True).start()
+            _request_loop = loop
+    return asyncio.run_coroutine_threadsafe(coroutine, _request_loop)
+
+
+def _shared_clients(api_key: str, max_concurrency: int) -> Tuple[OpenAI, AsyncOpenAI]:
+    """Return the process-wide sync and async clients for a key, creating them once.
+    
+    Keep-alive pools are sized for the concurrent batches, so TLS sessions
+    are reused across batches, calls and services; HTTP/2 when h2 is installed.
+    """
+    with _shared_clients_lock:
+        clients = _clients_by_key.get((api_key, max_concurrency))
+        if clients is None:
+            limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+            client = OpenAI(
+                api_key=api_key,
+                http_client=httpx.Client(http2=h2 is not None, limits=limits, timeout=_OPENAI_TIMEOUT)
+            )
+            # Transient errors are retried by tenacity with our own backoff, not by the SDK
+            aclient = AsyncOpenAI(
+                api_key=api_key,
+                max_retries=0,
+                http_client=httpx.AsyncClient(http2=h2 is not None, limits=limits, timeout=_OPENAI_TIMEOUT)
+            )
+            clients = _clients_by_key[(api_key, max_concurrency)] = (client, aclient)
+        return clients
+
+
+def _dedupe(texts: List[str]) -> Tuple[List[str], List[int]]:
+    """Return the distinct texts in first-seen order and each input's position among them."""
+    first_seen: Dict[str, int] = {}
+    positions = [first_seen.setdefault(text, len(first_seen)) for text in texts]
+    return list(first_seen), positions
+
+
+def _storage_dtype(name: Optional[str]) -> Optional[np.dtype]:
+    """Resolve the configured embedding storage dtype; None keeps Python lists.
+    
+    A list of 1536 Python floats takes about 49 KB, a float32 array 6 KB and
+    a float16 array 3 KB.
+    """
+    if not name:
+        return None
+    if name not in _EMBEDDING_STORAGE_DTYPES:
+        raise ValueError(
+            f"Unsupported embedding storage dtype: {name} "
+            f"(expected one of {', '.join(_EMBEDDING_STORAGE_DTYPES)})"
+        )
+    return np.dtype(name)
+
+
+def _pack_embeddings(embeddings: List[List[float]], dtype: np.dtype) -> List[Union[np.ndarray, List[float]]]:
+    """Copy a group's embeddings into one contiguous matrix and return its rows.
+    
+    One preallocated matrix per group instead of one array per chunk, with
+    each API row copied straight in; the rows are views, so chunks still
+    carry ordinary 1-D arrays. Rows are re-normalized to unit length once
+    here, so ``normalized=True`` scoring stays exact after float16 rounding.
+    Failed (empty) embeddings stay empty lists.
+    """
+    filled = [i for i, embedding in enumerate(embeddings) if embedding]
+    if not filled:
+        return embeddings
+    
+    matrix = np.empty((len(filled), len(embeddings[filled[0]])), dtype=dtype)
+    for row, i in enumerate(filled):
+        matrix[row] = embeddings[i]
+    
+    # Norms in float32 at least, so float16 rows are not normalized by a rounded norm
+    norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix, dtype=np.promote_types(dtype, np.float32)))
+    np.divide(matrix, np.where(norms == 0, 1, norms)[:, None], out=matrix, casting='unsafe')
+    
+    packed: List[Union[np.ndarray, List[float]]] = list(embeddings)
+    for row, i in enumerate(filled):
+        packed[i] = matrix[row]
+    return packed
+
+
+def _as_vector(embedding: Union[Sequence[float], np.ndarray]) -> np.ndarray:
+    """View an embedding as a float64 array; arrays pass through without copying."""
+    if isinstance(embedding, np.ndarray):
+        return embedding.astype(np.float64, copy=False)
+    # fromiter with a known count is the quickest way to convert a list of floats
+    return np.fromiter(embedding, dtype=np.float64, count=len(embedding))
+
+
+def _simsimd_compatible(embedding1: Any, embedding2: Any) -> bool:
+    """Whether both embeddings are arrays SimSIMD can score without conversion."""
+    return (
+        isinstance(embedding1, np.ndarray) and isinstance(embedding2, np.ndarray)
+        and embedding1.dtype == embedding2.dtype and embedding1.dtype in (np.float32, np.float16, np.int8)
+    )
+
+
+def _numba_compatible(embedding1: Any, embedding2: Any) -> bool:
+    """Whether both embeddings are float arrays the compiled cosine kernel accepts."""
+    return (
+        isinstance(embedding1, np.ndarray) and isinstance(embedding2, np.ndarray)
+        and embedding1.dtype == embedding2.dtype and embedding1.dtype in (np.float32, np.float64)
+        and embedding1.ndim == embedding2.ndim == 1
+    )
+
+
+def _cosine_kernel(vector1: np.ndarray, vector2: np.ndarray) -> float:
+    """Cosine similarity in a single loop over both vectors; 0.0 for zero vectors.
+    
+    An explicit loop rather than NumPy calls, so numba compiles it into one
+    vectorized pass.
+    """
+    dot_product = 0.0
+    squares1 = 0.0
+    squares2 = 0.0
+    for i in range(vector1.shape[0]):
+        a = vector1[i]
+        b = vector2[i]
+        dot_product += a * b
+        squares1 += a * a
+        squares2 += b * b
+    magnitudes = math.sqrt(squares1 * squares2)
+    return 0.0 if magnitudes == 0.0 else dot_product / magnitudes
+
+
+if njit is not None:
+    _cosine_kernel = njit(cache=True, fastmath=True)(_cosine_kernel)
+
+
+def _is_int8(embeddings: Any) -> bool:
+    """Whether embeddings were produced by ``quantize_embeddings``."""
+    return isinstance(embeddings, np.ndarray) and embeddings.dtype == np.int8
+
+
+def _as_matrix(embeddings: Union[Sequence[Sequence[float]], np.ndarray]) -> np.ndarray:
+    """Stack embeddings into a 2-D float64 array; a single vector becomes one row."""
+    matrix = np.asarray(embeddings, dtype=np.float64)
+    return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+
 # Utility functions
-def process_documents_with_embeddings(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def process_documents_with_embeddings(chunks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Process document chunks and add embeddings.
     
     Args:
-        chunks: Document chunks from document processor
+        chunks: Document chunks from document processor (a list or a
+            ``DocumentProcessor.iter_chunks()`` stream)
         
     Returns:
         Chunks with embeddings added
     """
+    return _default_embedding_service().add_embeddings_to_chunks(chunks)
+
+
+@functools.lru_cache(maxsize=1)
+def _default_embedding_service() -> EmbeddingService:
+    """Shared service for module-level helpers, connection-tested once per process.
+    
+    Reusing it keeps the pooled HTTP connections (and the embedding memo)
+    across calls; a failed connection test is not cached, so the next call
+    tries again.
+    """
     embedding_service = EmbeddingService()
     
     # Test connection first
     if not embedding_service.test_connection():
         raise RuntimeError("Cannot connect to OpenAI embedding service")
     
-    return embedding_service.add_embeddings_to_chunks(chunks)
+    return embedding_service
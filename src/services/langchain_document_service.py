@@ -15,19 +15,72 @@ Example:
     documents = processor.process_file("contract.pdf", {"partner": "Restaurant"})
     ```
 """
+import functools
+import json
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import os
 from datetime import datetime
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
+try:
+    from semantic_text_splitter import TextSplitter as NativeTextSplitter
+except ImportError:
+    NativeTextSplitter = None
+
 from src.services.document_service import DocumentProcessor
 from src.core.config import settings
+from src.core.disk_cache import PickleDiskCache
+from src.core.process_pool import PARALLEL_MIN_BYTES, PROCESS_POOL_CONTEXT
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extraction or splitting changes the Documents produced for a
+# file, so stale on-disk cache entries are never served
+_DOCUMENT_CACHE_VERSION = 1
+
+
+class _NativeSplitterAdapter:
+    """Expose semantic-text-splitter through the ``split_text`` interface.
+    
+    The Rust splitter walks the same cascade as the recursive splitter
+    (paragraphs, lines, words, characters) in native code instead of
+    rescanning the text in Python for every separator.
+    """
+    
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self._splitter = NativeTextSplitter(chunk_size, overlap=chunk_overlap)
+    
+    def split_text(self, text: str) -> List[str]:
+        return self._splitter.chunks(text)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_text_splitter(chunk_size: int, chunk_overlap: int):
+    """Return the shared chunk splitter, preferring the native one when installed.
+    
+    Splitters hold no per-call state, so one instance per configuration is
+    built and reused by every processor instead of once per request.
+    """
+    if NativeTextSplitter is not None:
+        return _NativeSplitterAdapter(chunk_size, chunk_overlap)
+    
+    # Use LangChain's RecursiveCharacterTextSplitter as required by Task 2
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=[
+            "\n\n",  # Double newlines (paragraphs)
+            "\n",    # Single newlines
+            " ",     # Spaces
+            ""       # Characters
+        ]
+    )
+
 
 class LangChainDocumentProcessor:
     """LangChain document processor for RAG pipeline integration.
@@ -37,7 +90,10 @@ class LangChainDocumentProcessor:
     
     Attributes:
         base_processor (DocumentProcessor): Core text extraction service.
-        text_splitter (RecursiveCharacterTextSplitter): LangChain text splitter.
+        cache (PickleDiskCache): Per-file Document cache, disabled unless
+            settings.document_cache_dir is set.
+        text_splitter: LangChain RecursiveCharacterTextSplitter, or the
+            native semantic-text-splitter when installed.
     
     Example:
         ```python
@@ -46,34 +102,42 @@ class LangChainDocumentProcessor:
         ```
     """
     
+    # Supported file types and the DocumentProcessor method extracting their
+    # text; looked up by name so subclasses and patched instances are honored
+    _EXTRACTORS = {
+        '.pdf': '_extract_pdf_text',
+        '.txt': '_extract_text_file',
+        '.md': '_extract_text_file',
+    }
+    
     def __init__(self):
         """Initialize document processor with LangChain text splitter.
         
         Sets up DocumentProcessor and RecursiveCharacterTextSplitter with
-        optimized configuration for financial documents.
+        optimized configuration for financial documents. When
+        semantic-text-splitter is installed its native splitter is used
+        instead, with the same chunk size and overlap.
         """
         self.base_processor = DocumentProcessor()
-        
-        # Use LangChain's RecursiveCharacterTextSplitter as required by Task 2
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap,
-            length_function=len,
-            separators=[
-                "\n\n",  # Double newlines (paragraphs)
-                "\n",    # Single newlines
-                " ",     # Spaces
-                ""       # Characters
-            ]
+        self.text_splitter = _get_text_splitter(settings.chunk_size, settings.chunk_overlap)
+        self.cache = PickleDiskCache(
+            os.path.join(settings.document_cache_dir, "documents") if settings.document_cache_dir else None,
+            max_bytes=settings.document_cache_max_mb * 1024 * 1024,
+            version=_DOCUMENT_CACHE_VERSION,
         )
         
-    def process_file_for_rag(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
+    def process_file_for_rag(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None,
+                             file_stat: Optional[os.stat_result] = None, use_cache: bool = True) -> List[Document]:
         """Process files into LangChain Document objects for RAG integration.
         
         Args:
             file_path (str): Path to document file (PDF, TXT, MD).
             document_metadata (Optional[Dict[str, Any]]): Additional metadata
                 for generated Document objects.
+            file_stat (Optional[os.stat_result]): Stat result the caller already
+                holds for file_path (e.g. from os.scandir); saves a stat call.
+            use_cache (bool): Read and write the Document cache, when enabled.
+                Pass False for one-off files such as API uploads.
         
         Returns:
             List[Document]: LangChain Document objects with chunked content
@@ -92,18 +156,55 @@ class LangChainDocumentProcessor:
             )
             ```
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
+        return list(self.iter_documents_for_rag(file_path, document_metadata, file_stat, use_cache))
+    
+    def iter_documents_for_rag(self, file_path: str, document_metadata: Optional[Dict[str, Any]] = None,
+                               file_stat: Optional[os.stat_result] = None,
+                               use_cache: bool = True) -> Iterator[Document]:
+        """Yield a file's LangChain Document objects one at a time.
+        
+        Lets callers embed or index a large document as it is converted
+        instead of holding every Document at once.
+        
+        Args:
+            file_path (str): Path to document file (PDF, TXT, MD).
+            document_metadata (Optional[Dict[str, Any]]): Additional metadata
+                for generated Document objects.
+            file_stat (Optional[os.stat_result]): Stat result the caller already
+                holds for file_path.
+            use_cache (bool): Read and write the Document cache, when enabled.
+        
+        Yields:
+            Document: Chunks in document order, with the same metadata as
+                :meth:`process_file_for_rag`.
+        
+        Raises:
+            FileNotFoundError: File path does not exist.
+            ValueError: Unsupported format or no extractable content.
+        """
+        if file_stat is None:
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found: {file_path}")
+        
+        # Unchanged files with identical settings produce identical Documents
+        cache_key = self._document_cache_key(file_path, file_stat, document_metadata) if use_cache else None
+        cached_documents = self.cache.get(cache_key) if cache_key else None
+        if cached_documents is not None:
+            logger.info(f"Loaded {len(cached_documents)} cached LangChain documents for '{file_path}'")
+            # Callers may mutate Documents; never hand out the memoized objects
+            for doc in cached_documents:
+                yield _copy_document(doc)
+            return
         
         # Extract text using the existing processor
         file_extension = os.path.splitext(file_path)[1].lower()
         
-        if file_extension == '.pdf':
-            text = self.base_processor._extract_pdf_text(file_path)
-        elif file_extension in ['.txt', '.md']:
-            text = self.base_processor._extract_text_file(file_path)
-        else:
+        extractor = self._EXTRACTORS.get(file_extension)
+        if extractor is None:
             raise ValueError(f"Unsupported file type: {file_extension}")
+        text = getattr(self.base_processor, extractor)(file_path)
         
         if not text.strip():
             raise ValueError("No text content found in the file")
@@ -112,7 +213,7 @@ class LangChainDocumentProcessor:
         base_metadata = {
             "file_path": file_path,
             "file_name": os.path.basename(file_path),
-            "file_size": os.path.getsize(file_path),
+            "file_size": file_stat.st_size,
             "file_type": file_extension,
             "processed_at": datetime.now().isoformat(),
             "total_characters": len(text),
@@ -121,29 +222,63 @@ class LangChainDocumentProcessor:
         if document_metadata:
             base_metadata.update(document_metadata)
         
-        # Use LangChain's text splitter
-        text_chunks = self.text_splitter.split_text(text)
+        text_chunks = self._split_text(text)
         
-        # Convert to LangChain Document objects
-        documents = []
+        # Convert to LangChain Document objects; copies go to the cache so
+        # callers can mutate the Documents they receive
+        cache_documents = [] if cache_key else None
+        file_name = base_metadata['file_name']
+        total_chunks = len(text_chunks)
         for i, chunk in enumerate(text_chunks):
-            # Add chunk-specific metadata
-            chunk_metadata = {
-                **base_metadata,
-                "chunk_index": i,
-                "total_chunks": len(text_chunks),
-                "chunk_id": f"{base_metadata['file_name']}_{i}",
-                "chunk_size": len(chunk)
-            }
+            # Add chunk-specific metadata; copy() is one bulk copy of the shared keys
+            chunk_metadata = base_metadata.copy()
+            chunk_metadata["chunk_index"] = i
+            chunk_metadata["total_chunks"] = total_chunks
+            chunk_metadata["chunk_id"] = f"{file_name}_{i}"
+            chunk_metadata["chunk_size"] = len(chunk)
             
             doc = Document(
                 page_content=chunk,
                 metadata=chunk_metadata
             )
-            documents.append(doc)
+            if cache_documents is not None:
+                cache_documents.append(_copy_document(doc))
+            yield doc
+        if cache_key:
+            self.cache.put(cache_key, cache_documents)
         
-        logger.info(f"Processed file '{file_path}' into {len(documents)} LangChain documents")
-        return documents
+        logger.info(f"Processed file '{file_path}' into {total_chunks} LangChain documents")
+    
+    def _split_text(self, text: str) -> List[str]:
+        """Split text into chunk strings.
+        
+        Text that already fits in one chunk is returned whole, stripped as the
+        splitters would, without walking the separator cascade.
+        """
+        if len(text) <= settings.chunk_size:
+            return [text.strip()]
+        return self.text_splitter.split_text(text)
+    
+    def _document_cache_key(self, file_path: str, file_stat: os.stat_result,
+                            document_metadata: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+        """Build the Document cache key for a file, or None when caching is disabled.
+        
+        The key covers the file identity (absolute path, mtime, size), the
+        splitter configuration and the caller metadata, so any change to the
+        file or settings maps to a fresh entry.
+        """
+        if not self.cache.enabled:
+            return None
+        
+        return (
+            os.path.abspath(file_path),
+            file_stat.st_mtime_ns,
+            file_stat.st_size,
+            settings.chunk_size,
+            settings.chunk_overlap,
+            type(self.text_splitter).__name__,
+            json.dumps(document_metadata or {}, sort_keys=True, default=str),
+        )
     
     def process_text_for_rag(self, text: str, document_metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
         """
@@ -169,20 +304,18 @@ class LangChainDocumentProcessor:
         if document_metadata:
             base_metadata.update(document_metadata)
         
-        # Use LangChain's text splitter
-        text_chunks = self.text_splitter.split_text(text)
+        text_chunks = self._split_text(text)
         
         # Convert to LangChain Document objects
         documents = []
+        total_chunks = len(text_chunks)
         for i, chunk in enumerate(text_chunks):
             # Add chunk-specific metadata
-            chunk_metadata = {
-                **base_metadata,
-                "chunk_index": i,
-                "total_chunks": len(text_chunks),
-                "chunk_id": f"text_input_{i}",
-                "chunk_size": len(chunk)
-            }
+            chunk_metadata = base_metadata.copy()
+            chunk_metadata["chunk_index"] = i
+            chunk_metadata["total_chunks"] = total_chunks
+            chunk_metadata["chunk_id"] = f"text_input_{i}"
+            chunk_metadata["chunk_size"] = len(chunk)
             
             doc = Document(
                 page_content=chunk,
@@ -197,6 +330,9 @@ class LangChainDocumentProcessor:
         """
         Process all documents for a specific partner (contract + payout reports).
         
+        Large sets of files are processed by a pool of spawned worker
+        processes, one file per task, since PDF extraction is CPU-bound.
+        
         Args:
             partner_name: Name of the partner (e.g., "Sushi Express")
             document_dir: Directory containing the documents
@@ -217,19 +353,24 @@ class LangChainDocumentProcessor:
         # Look for files related to this partner
         partner_key = partner_name.lower().replace(" ", "_").replace("-", "_")
         
-        for filename in os.listdir(document_dir):
-            if filename.endswith(('.txt', '.pdf')) and partner_key in filename.lower():
-                file_path = os.path.join(document_dir, filename)
+        # scandir yields the stat results with the listing; each name is
+        # lowercased once for both the partner filter and the type checks
+        tasks = []
+        with os.scandir(document_dir) as entries:
+            for entry in entries:
+                lower_name = entry.name.lower()
+                if not lower_name.endswith(('.txt', '.pdf')) or partner_key not in lower_name:
+                    continue
                 
                 # Determine document type based on filename
-                if 'contract' in filename.lower():
+                if 'contract' in lower_name:
                     doc_type = "contract"
                     doc_metadata = {
                         "document_type": "contract",
                         "partner_name": partner_name,
                         "title": f"{partner_name} Partnership Agreement"
                     }
-                elif 'payout' in filename.lower() or 'report' in filename.lower():
+                elif 'payout' in lower_name or 'report' in lower_name:
                     doc_type = "payout_report"
                     doc_metadata = {
                         "document_type": "payout_report",
@@ -241,16 +382,33 @@ class LangChainDocumentProcessor:
                     doc_metadata = {
                         "document_type": "other",
                         "partner_name": partner_name,
-                        "title": filename
+                        "title": entry.name
                     }
-                
-                try:
-                    documents = self.process_file_for_rag(file_path, doc_metadata)
-                    partner_documents[doc_type].extend(documents)
-                    logger.info(f"Processed {doc_type} '{filename}': {len(documents)} documents")
-                except Exception as e:
-                    logger.error(f"Failed to process '{filename}': {e}")
-                    continue
+                tasks.append((entry.path, doc_type, doc_metadata, entry.stat()))
+        
+        total_bytes = sum(file_stat.st_size for _, _, _, file_stat in tasks)
+        workers = min(len(tasks), os.cpu_count() or 1) if total_bytes >= PARALLEL_MIN_BYTES else 1
+        results = None
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_POOL_CONTEXT) as executor:
+                    results = list(executor.map(_process_partner_file, *zip(*tasks)))
+            except (OSError, RuntimeError) as e:
+                # Process pools are unavailable in some sandboxes; process in-process instead
+                logger.warning(f"Parallel partner processing unavailable, falling back to sequential: {e}")
+        if results is None:
+            results = [
+                _process_partner_file(file_path, doc_type, doc_metadata, file_stat, self)
+                for file_path, doc_type, doc_metadata, file_stat in tasks
+            ]
+        
+        for file_path, doc_type, documents, error in results:
+            filename = os.path.basename(file_path)
+            if error:
+                logger.error(f"Failed to process '{filename}': {error}")
+                continue
+            partner_documents[doc_type].extend(documents)
+            logger.info(f"Processed {doc_type} '{filename}': {len(documents)} documents")
         
         total_docs = sum(len(docs) for docs in partner_documents.values())
         logger.info(f"Processed all documents for '{partner_name}': {total_docs} total documents")
@@ -258,6 +416,30 @@ class LangChainDocumentProcessor:
         return partner_documents
 
 
+def _copy_document(doc: Document) -> Document:
+    """Copy a Document with its own metadata dict."""
+    return Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+
+
+def _process_partner_file(file_path: str, doc_type: str, doc_metadata: Dict[str, Any],
+                          file_stat: Optional[os.stat_result] = None,
+                          processor: Optional[LangChainDocumentProcessor] = None
+                          ) -> Tuple[str, str, List[Document], Optional[str]]:
+    """Split one partner file; module-level so worker processes can run it.
+    
+    Returns:
+        Tuple of (file_path, doc_type, documents, error message or None).
+    """
+    if processor is None:
+        # This process already handles a whole document, so pages stay in-process
+        processor = LangChainDocumentProcessor()
+    
+    try:
+        return file_path, doc_type, processor.process_file_for_rag(file_path, doc_metadata, file_stat), None
+    except Exception as e:
+        return file_path, doc_type, [], str(e)
+
+
 def test_langchain_processor():
     """Test the LangChain document processor."""
     processor = LangChainDocumentProcessor()
@@ -11,14 +11,40 @@ interface for document operations with proper error handling and logging.
 """
 import logging
 from typing import Dict, List, Optional, Any
-from opensearchpy import OpenSearch, RequestsHttpConnection
+from opensearchpy import JSONSerializer, OpenSearch, RequestsHttpConnection
 from opensearchpy.exceptions import OpenSearchException
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from src.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+class _OrjsonSerializer(JSONSerializer):
+    """Request serializer that encodes bodies with orjson.
+
+    Chunk documents carry embedding vectors as numpy arrays; orjson writes
+    them straight from the array buffer instead of walking one Python float
+    at a time through ``json.dumps``. Types orjson does not know natively
+    fall back to the stock serializer's ``default`` hook. The result is
+    decoded to ``str`` because the bulk helpers join and size serialized
+    actions as text.
+    """
+
+    def dumps(self, data: Any) -> Any:
+        if isinstance(data, (str, bytes)):
+            return data
+        return orjson.dumps(
+            data,
+            default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+
+
 class OpenSearchService:
     """Service for comprehensive OpenSearch operations and document management.
     
@@ -67,7 +93,8 @@ class OpenSearchService:
                 connection_class=RequestsHttpConnection,
                 timeout=30,
                 max_retries=3,
-                retry_on_timeout=True
+                retry_on_timeout=True,
+                **({'serializer': _OrjsonSerializer()} if orjson is not None else {})
             )
             
             logger.info(f"OpenSearch client initialized for {settings.opensearch_url}")
@@ -137,6 +164,14 @@ class OpenSearchService:
                         "type": "float",
                         "index": False
                     },
+                    "embedding_i8": {
+                        "type": "byte",
+                        "index": False
+                    },
+                    "embedding_scale": {
+                        "type": "float",
+                        "index": False
+                    },
                     "created_at": {
                         "type": "date"
                     }
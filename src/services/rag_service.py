@@ -59,7 +59,7 @@ class FinancialAnalystRAGChain:
     def __init__(self):
         """Initialize the RAG chain with OpenAI and OpenSearch components.
         
-        Sets up GPT-4 for analysis, Ada-002 for embeddings, document processor,
+        Sets up GPT-4 for analysis, the configured embedding model, document processor,
         and specialized financial analysis prompts.
         
         Raises:
@@ -77,8 +77,10 @@ class FinancialAnalystRAGChain:
             streaming=False      # Explicitly disable streaming to prevent character separation
         )
         
+        # Same model and size as EmbeddingService, so vectors are comparable
         self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-ada-002",
+            model=settings.embedding_model,
+            dimensions=settings.embedding_dimensions or None,
             openai_api_key=settings.openai_api_key
         )
         
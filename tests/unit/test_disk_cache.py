@@ -0,0 +1,74 @@
+"""
+Tests for the on-disk pickle cache.
+"""
+import pytest
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.disk_cache import PickleDiskCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_memory():
+    """Start every test without memoized entries."""
+    PickleDiskCache.clear_memory()
+    yield
+    PickleDiskCache.clear_memory()
+
+
+class TestPickleDiskCache:
+    """Test cases for PickleDiskCache."""
+
+    def test_put_then_get_round_trips(self, tmp_path):
+        """Test a stored value is returned for the same key only."""
+        cache = PickleDiskCache(str(tmp_path / "cache"))
+        cache.put(("contract.txt", 1), [{"content": "Commission is 30%."}])
+
+        assert cache.get(("contract.txt", 1)) == [{"content": "Commission is 30%."}]
+        assert cache.get(("contract.txt", 2)) is None
+
+    def test_version_is_part_of_the_key(self, tmp_path):
+        """Test entries written by another version are never served."""
+        PickleDiskCache(str(tmp_path), version=1).put(("contract.txt",), "old")
+
+        assert PickleDiskCache(str(tmp_path), version=2).get(("contract.txt",)) is None
+
+    def test_disabled_cache_writes_nothing(self, tmp_path):
+        """Test a cache without a directory misses and never touches the disk."""
+        cache = PickleDiskCache(None)
+        cache.put(("contract.txt",), "value")
+
+        assert not cache.enabled
+        assert cache.get(("contract.txt",)) is None
+        assert os.listdir(tmp_path) == []
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        """Test a corrupt entry is ignored instead of raising."""
+        cache = PickleDiskCache(str(tmp_path))
+        with open(cache.path_for(("contract.txt",)), 'wb') as entry:
+            entry.write(b"not a pickle")
+
+        assert cache.get(("contract.txt",)) is None
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        """Test writes evict the entry read or written longest ago."""
+        cache = PickleDiskCache(str(tmp_path))
+        cache.put(("first",), "a" * 100)
+        entry_size = os.path.getsize(cache.path_for(("first",)))
+        cache.max_bytes = 2 * entry_size + entry_size // 2
+
+        # Age existing entries before each step so mtime order is unambiguous
+        for key in (("second",), None, ("third",)):
+            for entry in os.scandir(tmp_path):
+                os.utime(entry.path, ns=(0, entry.stat().st_mtime_ns - 10**9))
+            if key is None:
+                assert cache.get(("first",)) == "a" * 100
+            else:
+                cache.put(key, "a" * 100)
+
+        assert not os.path.exists(cache.path_for(("second",)))
+        assert os.path.exists(cache.path_for(("first",)))
+        assert os.path.exists(cache.path_for(("third",)))
@@ -0,0 +1,89 @@
+"""
+Tests for document indexing service.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services.document_indexing_service import DocumentIndexingService
+
+
+@pytest.fixture
+def service():
+    """Indexing service with a mocked OpenSearch client and no chunk cache."""
+    with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+            patch('src.services.document_service.settings.document_cache_dir', ''), \
+            patch('src.services.document_indexing_service.OpenSearchService'):
+        service = DocumentIndexingService()
+    service.opensearch_service.index_document.return_value = True
+    return service
+
+
+class TestDocumentIndexingFile:
+    """Test cases for indexing a single file."""
+
+    def test_use_cache_is_passed_to_the_chunker(self, service, tmp_path):
+        """Test uploads can opt out of the chunk cache through index_file."""
+        contract = tmp_path / "partner_contract.txt"
+        contract.write_text("Commission is 30% of gross order value.")
+
+        with patch.object(service.embedding_service, 'generate_embeddings_batch',
+                          side_effect=lambda texts: [[0.1, 0.2] for _ in texts]), \
+                patch.object(service.document_processor, 'iter_chunks',
+                             wraps=service.document_processor.iter_chunks) as iter_chunks:
+            result = service.index_file(str(contract), {"document_type": "contract"}, use_cache=False)
+
+        assert result["status"] == "success"
+        assert iter_chunks.call_args.kwargs["use_cache"] is False
+
+
+class TestDocumentIndexingDirectory:
+    """Test cases for bulk directory indexing."""
+
+    def test_directory_chunks_are_embedded_together(self, service, tmp_path):
+        """Test chunks of all files share embedding batches and are counted per file."""
+        (tmp_path / "partner_contract.txt").write_text("Commission is 30% of gross order value.")
+        (tmp_path / "weekly_payout.txt").write_text("Net payout 1,250.00 EUR.")
+        (tmp_path / "empty.txt").write_text("   ")
+
+        with patch.object(service.embedding_service, 'generate_embeddings_batch',
+                          side_effect=lambda texts: [[0.1, 0.2] for _ in texts]) as embed:
+            results = service.index_directory(str(tmp_path))
+
+        assert embed.call_count == 1
+        assert len(embed.call_args.args[0]) == 2
+        assert results["successful_files"] == 2
+        assert results["failed_files"] == 1
+        assert results["total_indexed_chunks"] == 2
+        indexed = {
+            os.path.basename(result["file_path"]): result.get("indexed_chunks")
+            for result in results["processed_files"]
+        }
+        assert indexed == {"partner_contract.txt": 1, "weekly_payout.txt": 1, "empty.txt": None}
+
+
+class TestDocumentIndexingSearch:
+    """Test cases for semantic search result scoring."""
+
+    def test_hits_with_embeddings_get_cosine_similarity(self, service):
+        """Test every hit carrying a unit embedding is scored against the query."""
+        service.opensearch_service.client.search.return_value = {
+            "hits": {
+                "total": {"value": 3},
+                "hits": [
+                    {"_id": "a", "_score": 2.0, "_source": {"content": "Fees", "embedding": [1.0, 0.0]}},
+                    {"_id": "b", "_score": 1.5, "_source": {"content": "Terms"}},
+                    {"_id": "c", "_score": 1.0, "_source": {"content": "Refunds", "embedding": [0.0, 1.0]}},
+                ],
+            }
+        }
+
+        with patch.object(service.embedding_service, 'generate_embedding', return_value=[0.6, 0.8]):
+            response = service.semantic_search("commission fees")
+
+        similarities = [result.get("similarity") for result in response["results"]]
+        assert similarities == [pytest.approx(0.6), None, pytest.approx(0.8)]
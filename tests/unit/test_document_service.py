@@ -0,0 +1,363 @@
+"""
+Tests for document processing service.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.core.disk_cache import PickleDiskCache
+from src.services import document_service as document_module
+from src.services.document_service import (
+    DocumentProcessor, _window_span_indices, process_sample_documents
+)
+
+
+class TestDocumentProcessorCleaning:
+    """Test cases for text cleaning helpers."""
+
+    def test_clean_text_strips_control_characters(self):
+        """Test control characters are removed from ASCII text."""
+        processor = DocumentProcessor()
+
+        cleaned = processor._clean_text("Commission\x00 rate\x07 is 30%.\x7f")
+
+        assert cleaned == "Commission rate is 30%."
+
+    def test_clean_text_keeps_non_ascii_characters(self):
+        """Test accented letters, currency signs and astral code points survive."""
+        processor = DocumentProcessor()
+
+        cleaned = processor._clean_text("Fee: 5€\U0001F355 per order\x85 café")
+
+        assert cleaned == "Fee: 5€\U0001F355 per order café"
+
+    def test_clean_extracted_text_normalizes_layout_whitespace(self):
+        """Test layout padding, line wraps and punctuation spacing are normalized."""
+        processor = DocumentProcessor()
+        raw = "Commission   rate\t: 30%\nof gross value .\n\n\n\nPayouts weekly,net of fees"
+
+        cleaned = processor._clean_extracted_text(raw)
+
+        assert cleaned == "Commission rate: 30% of gross value.\n\nPayouts weekly, net of fees"
+
+
+class TestDocumentProcessorTextExtraction:
+    """Test cases for plain text file extraction."""
+
+    def test_extract_text_file_falls_back_to_latin1_and_normalizes_newlines(self, tmp_path):
+        """Test non-UTF-8 files are decoded as Latin-1 with newlines normalized."""
+        processor = DocumentProcessor()
+        report = tmp_path / "payout_report.txt"
+        report.write_bytes("Caf\xe9 Central\r\nNet payout\r12.50".encode("latin-1"))
+
+        text = processor._extract_text_file(str(report))
+
+        assert text == "Caf\xe9 Central\nNet payout\n12.50"
+
+
+class TestDocumentProcessorChunking:
+    """Test cases for chunk boundary detection."""
+
+    def test_window_spans_prefer_last_sentence_end(self):
+        """Test a window ends after the latest sentence terminator before the limit."""
+        processor = DocumentProcessor()
+        processor.chunk_size = 40
+        processor.chunk_overlap = 0
+        text = "Fees apply. Payouts weekly! Version 2.5 applies to all partners"
+
+        spans = processor._window_spans(text)
+
+        assert spans[0][:2] == [0, text.index("!") + 1]
+
+    def test_window_spans_carry_stripped_content_bounds(self):
+        """Test content bounds match str.strip() on each window, Unicode spaces included."""
+        processor = DocumentProcessor()
+        processor.chunk_size = 12
+        processor.chunk_overlap = 3
+        text = "Net\u2009payout due. Fees apply \u3000weekly. Refunds later"
+
+        spans = processor._window_spans(text)
+
+        assert [text[content_start:content_end] for _, _, content_start, content_end in spans] == [
+            text[start:end].strip() for start, end, _, _ in spans
+        ]
+
+    def test_window_span_indices_fall_back_to_word_then_hard_cut(self):
+        """Test windows end at whitespace without sentences, else at chunk_size."""
+        processor = DocumentProcessor()
+        sentence_ends, word_breaks = processor._boundary_positions("net amount due now")
+        _, no_breaks = processor._boundary_positions("a" * 100)
+
+        word_spans = _window_span_indices(sentence_ends, word_breaks, 18, 12, 4)
+        hard_spans = _window_span_indices(sentence_ends, no_breaks, 100, 40, 10)
+
+        assert word_spans.tolist() == [[0, 10], [10, 22]]
+        assert hard_spans.tolist() == [[0, 40], [40, 80], [80, 120]]
+
+    def test_boundary_positions_keep_character_offsets_for_non_ascii_text(self):
+        """Test offsets stay aligned and non-Latin-1 characters are not terminators."""
+        processor = DocumentProcessor()
+        text = "Fee 5€ due. Net 2"
+
+        sentence_ends, word_breaks = processor._boundary_positions(text)
+
+        assert list(sentence_ends) == [text.index(".") + 1]
+        assert list(word_breaks) == [i for i, c in enumerate(text) if c.isspace()]
+
+
+class TestDocumentProcessorRecursiveChunking:
+    """Test cases for the recursive paragraph/sentence/word chunker."""
+
+    @pytest.fixture
+    def processor(self):
+        """Processor configured for recursive chunking with small chunks."""
+        with patch('src.services.document_service.settings.chunking_strategy', 'recursive'):
+            processor = DocumentProcessor()
+        processor.chunk_size = 80
+        processor.chunk_overlap = 20
+        return processor
+
+    def test_paragraphs_are_packed_without_mid_sentence_cuts(self, processor):
+        """Test short paragraphs are combined and long ones split at sentence ends."""
+        text = (
+            "Commission is 30%.\n\nPayouts are weekly.\n\n"
+            "Refunds are deducted from the next payout. Disputes must be raised within 14 days."
+        )
+
+        chunks = processor._create_chunks(text, {"file_name": "contract.txt"})
+
+        assert [chunk["content"] for chunk in chunks] == [
+            "Commission is 30%.\n\nPayouts are weekly.",
+            "Payouts are weekly.\n\nRefunds are deducted from the next payout.",
+            "Disputes must be raised within 14 days.",
+        ]
+        assert all(chunk["chunk_size"] <= processor.chunk_size for chunk in chunks)
+
+    def test_unknown_strategy_is_rejected(self):
+        """Test a misconfigured chunking strategy fails fast."""
+        with patch('src.services.document_service.settings.chunking_strategy', 'semantic'):
+            with pytest.raises(ValueError, match="Unsupported chunking strategy"):
+                DocumentProcessor()
+
+
+class TestDocumentProcessorCache:
+    """Test cases for the persistent chunk cache."""
+
+    @pytest.fixture
+    def processor(self, tmp_path):
+        """Processor writing its chunk cache under a temporary directory."""
+        PickleDiskCache.clear_memory()
+        with patch('src.services.document_service.settings.document_cache_dir', str(tmp_path / "cache")):
+            yield DocumentProcessor()
+        PickleDiskCache.clear_memory()
+
+    def test_unchanged_file_is_served_from_cache(self, processor, tmp_path):
+        """Test a second call for the same file skips extraction."""
+        contract = tmp_path / "contract.txt"
+        contract.write_text("Commission is 30% of gross order value. Payouts are weekly.")
+
+        with patch.object(processor, '_extract_text_file', wraps=processor._extract_text_file) as extract:
+            first = processor.process_file(str(contract), {"partner_name": "Sushi Express"})
+            second = processor.process_file(str(contract), {"partner_name": "Sushi Express"})
+
+        assert extract.call_count == 1
+        assert second == first
+        assert second[0] is not first[0]
+
+    def test_iter_chunks_caches_unmodified_copies(self, processor, tmp_path):
+        """Test streamed chunks are cached once exhausted, unaffected by caller edits."""
+        contract = tmp_path / "contract.txt"
+        contract.write_text("Commission is 30% of gross order value. Payouts are weekly.")
+
+        streamed = []
+        for chunk in processor.iter_chunks(str(contract)):
+            chunk["embedding"] = [0.1, 0.2]
+            streamed.append(chunk)
+        cached = processor.process_file(str(contract))
+
+        assert [chunk["content"] for chunk in cached] == [chunk["content"] for chunk in streamed]
+        assert "embedding" not in cached[0]
+
+    def test_modified_file_invalidates_cache(self, processor, tmp_path):
+        """Test a changed file is re-extracted instead of served stale."""
+        contract = tmp_path / "contract.txt"
+        contract.write_text("Commission is 30%.")
+        processor.process_file(str(contract))
+
+        contract.write_text("Commission is 25% of gross order value.")
+        os.utime(contract, ns=(0, 10**9))
+        chunks = processor.process_file(str(contract))
+
+        assert chunks[0]["content"] == "Commission is 25% of gross order value."
+
+    def test_use_cache_false_bypasses_cache(self, processor, tmp_path):
+        """Test one-off files such as uploads neither read nor write cache entries."""
+        contract = tmp_path / "contract.txt"
+        contract.write_text("Commission is 30% of gross order value.")
+
+        chunks = processor.process_file(str(contract), use_cache=False)
+        assert chunks[0]["content"] == "Commission is 30% of gross order value."
+        assert not os.path.exists(processor.cache.cache_dir)
+
+        processor.process_file(str(contract))
+        with patch.object(processor, '_extract_text_file', wraps=processor._extract_text_file) as extract:
+            processor.process_file(str(contract), use_cache=False)
+        assert extract.call_count == 1
+
+    def test_cache_is_pruned_to_size_limit(self, processor, tmp_path):
+        """Test least recently used entries are evicted once the cache exceeds its limit."""
+        contracts = []
+        for name in ("first.txt", "second.txt", "third.txt"):
+            contract = tmp_path / name
+            contract.write_text(f"Commission terms of {name}.")
+            contracts.append(contract)
+        processor.process_file(str(contracts[0]))
+        entry_size = os.path.getsize(next(os.scandir(processor.cache.cache_dir)).path)
+        processor.cache.max_bytes = 2 * entry_size + entry_size // 2
+
+        for contract in contracts[1:]:
+            for entry in os.scandir(processor.cache.cache_dir):
+                os.utime(entry.path, ns=(0, entry.stat().st_mtime_ns - 10**9))
+            processor.process_file(str(contract))
+
+        assert len(os.listdir(processor.cache.cache_dir)) == 2
+        with patch.object(processor, '_extract_text_file', wraps=processor._extract_text_file) as extract:
+            processor.process_file(str(contracts[2]))
+            processor.process_file(str(contracts[0]))
+        assert extract.call_count == 1
+
+
+class TestProcessSampleDocuments:
+    """Test cases for batch processing of the sample corpus."""
+
+    @pytest.fixture
+    def sample_dir(self, tmp_path, monkeypatch):
+        """Working directory holding a small sample corpus."""
+        sample_dir = tmp_path / "data" / "sample_contracts"
+        sample_dir.mkdir(parents=True)
+        (sample_dir / "partner_contract.txt").write_text("Commission is 30% of gross order value.")
+        (sample_dir / "weekly_payout.txt").write_text("Net payout 1,250.00 EUR.")
+        (sample_dir / "notes.md").write_text("Not part of the corpus.")
+        monkeypatch.chdir(tmp_path)
+        return sample_dir
+
+    @pytest.mark.parametrize("cpu_count, min_bytes", [(1, 0), (2, 0), (2, 10**9)])
+    def test_files_keep_size_order(self, sample_dir, cpu_count, min_bytes):
+        """Test sequential and worker-process runs return every file's chunks, smallest file first."""
+        with patch('src.services.document_service.settings.document_cache_dir', ''), \
+                patch('src.services.document_service.os.cpu_count', return_value=cpu_count), \
+                patch('src.services.document_service.PARALLEL_MIN_BYTES', min_bytes), \
+                patch('src.services.document_service.ProcessPoolExecutor',
+                      wraps=document_module.ProcessPoolExecutor) as pool:
+            chunks = process_sample_documents()
+
+        if cpu_count > 1 and not min_bytes:
+            assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+        else:
+            pool.assert_not_called()
+
+        assert [chunk["content"] for chunk in chunks] == [
+            "Net payout 1,250.00 EUR.",
+            "Commission is 30% of gross order value.",
+        ]
+        assert [chunk["document_type"] for chunk in chunks] == ["payout_report", "contract"]
+
+
+class TestDocumentProcessorPdfExtraction:
+    """Test cases for PDF text extraction."""
+
+    @pytest.fixture
+    def multi_page_pdf(self, tmp_path):
+        """Six-page PDF whose pages state their own page number."""
+        fitz = pytest.importorskip("fitz")
+        pdf_path = tmp_path / "payout_report.pdf"
+        document = fitz.open()
+        for page_number in range(1, 7):
+            page = document.new_page()
+            page.insert_text((72, 72), f"Payout statement page {page_number}.")
+        document.save(str(pdf_path))
+        document.close()
+        return str(pdf_path)
+
+    def test_parallel_extraction_preserves_page_order(self, multi_page_pdf):
+        """Test page ranges extracted by spawned worker processes are reassembled in order."""
+        processor = DocumentProcessor()
+        processor.parallel_pdf_pages = True
+
+        with patch('src.services.document_service._PARALLEL_PDF_MIN_PAGES', 2), \
+                patch('src.services.document_service.os.cpu_count', return_value=4), \
+                patch('src.services.document_service.ProcessPoolExecutor',
+                      wraps=document_module.ProcessPoolExecutor) as pool:
+            page_texts = processor._extract_pdf_pages(multi_page_pdf)
+
+        assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+
+        assert [text.strip() for text in page_texts] == [
+            f"Payout statement page {page_number}." for page_number in range(1, 7)
+        ]
+
+    def test_request_handling_extracts_pages_in_process(self, multi_page_pdf):
+        """Test a default processor never starts a page pool, however large the PDF."""
+        processor = DocumentProcessor()
+
+        with patch('src.services.document_service._PARALLEL_PDF_MIN_PAGES', 2), \
+                patch('src.services.document_service.os.cpu_count', return_value=4), \
+                patch('src.services.document_service.ProcessPoolExecutor', side_effect=AssertionError("pool")):
+            page_texts = processor._extract_pdf_pages(multi_page_pdf)
+
+        assert len(page_texts) == 6
+
+    def test_pdf_chunks_flatten_page_breaks(self, multi_page_pdf):
+        """Test PDF chunks are normalized like any other text, page breaks included."""
+        with patch('src.services.document_service.settings.document_cache_dir', ''):
+            processor = DocumentProcessor()
+
+        chunks = processor.process_file(multi_page_pdf)
+        text = processor._extract_pdf_text(multi_page_pdf)
+
+        assert "\n\n" in text
+        assert chunks[0]["content"].startswith("Payout statement page 1. Payout statement page 2.")
+        assert not any("\n" in chunk["content"] for chunk in chunks)
+        assert [chunk["content"] for chunk in chunks] == [
+            chunk["content"] for chunk in processor._create_chunks(text, {})
+        ]
+
+    def test_table_finder_runs_only_on_pages_with_ruling_graphics(self, multi_page_pdf, tmp_path):
+        """Test text-only pages skip find_tables while drawn tables are still rendered."""
+        fitz = pytest.importorskip("fitz")
+        table_pdf = tmp_path / "fee_table.pdf"
+        document = fitz.open()
+        page = document.new_page()
+        for row, cells in enumerate([("Order", "Fee"), ("1001", "2.50")]):
+            for column, cell in enumerate(cells):
+                rect = fitz.Rect(72 + column * 100, 72 + row * 30, 172 + column * 100, 102 + row * 30)
+                page.draw_rect(rect, color=(0, 0, 0), width=1)
+                page.insert_text((rect.x0 + 5, rect.y1 - 10), cell)
+        document.save(str(table_pdf))
+        document.close()
+        processor = DocumentProcessor()
+
+        with patch.object(fitz.Page, 'find_tables', autospec=True, side_effect=fitz.Page.find_tables) as find_tables:
+            text_pages = processor._extract_pdf_pages(multi_page_pdf)
+            text_only_calls = find_tables.call_count
+            table_pages = processor._extract_pdf_pages(str(table_pdf))
+
+        assert text_only_calls == 0
+        assert len(text_pages) == 6
+        assert table_pages[0].startswith("\n[TABLE 1]\nOrder | Fee\n1001 | 2.50\n[END TABLE]\n")
+
+    def test_pdfplumber_is_used_without_pymupdf(self, multi_page_pdf):
+        """Test pdfplumber extracts the same pages when PyMuPDF is unavailable."""
+        pytest.importorskip("pdfplumber")
+        processor = DocumentProcessor()
+
+        with patch('src.services.document_service.fitz', None):
+            page_texts = processor._extract_pdf_pages(multi_page_pdf)
+
+        assert [text.strip() for text in page_texts] == [
+            f"Payout statement page {page_number}." for page_number in range(1, 7)
+        ]
@@ -0,0 +1,677 @@
+"""
+Tests for embedding service.
+"""
+import asyncio
+import json
+import pytest
+import sys
+import os
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import numpy as np
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.services import embedding_service as embedding_module
+from src.services.embedding_service import EmbeddingCache, EmbeddingService, process_documents_with_embeddings
+
+
+@pytest.fixture
+def service():
+    """Embedding service configured with a dummy API key and no cache; no requests are sent."""
+    with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+            patch('src.services.embedding_service.settings.document_cache_dir', ''):
+        yield EmbeddingService()
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for AsyncOpenAI returning one-dimensional embeddings of text length."""
+
+    def __init__(self, fail_on=(), rate_limited_calls=0, error=RateLimitError, latency=0):
+        self.fail_on = set(fail_on)
+        self.latency = latency
+        self.rate_limited_calls = rate_limited_calls
+        self.error = error
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    async def create(self, model, input, **options):
+        self.calls += 1
+        if self.calls <= self.rate_limited_calls:
+            status = {RateLimitError: 429, InternalServerError: 500, BadRequestError: 400}[self.error]
+            response = httpx.Response(status, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+            raise self.error("Request failed", response=response, body=None)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        if input[0] in self.fail_on:
+            raise ConnectionError("upstream unavailable")
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text))]) for text in input])
+
+
+class TestEmbeddingBatches:
+    """Test cases for concurrent batch embedding generation."""
+
+    def test_batches_run_concurrently_and_keep_input_order(self, service):
+        """Test results follow input order with requests capped by max_concurrency."""
+        client = service.aclient = FakeAsyncOpenAI(latency=0.05)
+        service.batch_size = 2
+        service.max_concurrency = 2
+        texts = ["a", "bb", "", "ccc", "dddd", "eeeee"]
+
+        embeddings = service.generate_embeddings_batch(texts)
+
+        assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+        assert client.max_in_flight == 2
+
+    def test_repeated_texts_are_sent_once(self, service):
+        """Test duplicate texts share one API row and keep their input positions."""
+        client = service.aclient = FakeAsyncOpenAI()
+        sent = []
+        create = client.create
+
+        async def recording_create(model, input, **options):
+            sent.extend(input)
+            return await create(model, input, **options)
+
+        client.embeddings.create = recording_create
+
+        embeddings = service.generate_embeddings_batch(["fee", "payout", "fee", "fee"])
+
+        assert embeddings == [[3.0], [6.0], [3.0], [3.0]]
+        assert sent == ["fee", "payout"]
+
+    def test_texts_are_batched_by_length_and_returned_in_input_order(self, service):
+        """Test similar lengths share a batch while results follow the input order."""
+        client = service.aclient = FakeAsyncOpenAI()
+        service.batch_size = 2
+        sent = []
+        create = client.create
+
+        async def recording_create(model, input, **options):
+            sent.append(list(input))
+            return await create(model, input, **options)
+
+        client.embeddings.create = recording_create
+
+        embeddings = service.generate_embeddings_batch(["dddd", "a", "eeeee", "bb"])
+
+        assert embeddings == [[4.0], [1.0], [5.0], [2.0]]
+        assert sorted(sent) == [["a", "bb"], ["dddd", "eeeee"]]
+
+    def test_failed_batch_yields_empty_embeddings(self, service):
+        """Test a failing batch is reported as empty lists without losing the others."""
+        service.aclient = FakeAsyncOpenAI(fail_on={"ccc"})
+        service.batch_size = 2
+
+        embeddings = service.generate_embeddings_batch(["a", "bb", "ccc", "dddd", "eeeee"])
+
+        assert embeddings == [[1.0], [2.0], [], [], [5.0]]
+
+    def test_rate_limited_batch_is_retried(self, service):
+        """Test 429 responses are retried with backoff instead of failing the batch."""
+        client = service.aclient = FakeAsyncOpenAI(rate_limited_calls=2)
+        service.rate_limit_delay = 0
+
+        embeddings = service.generate_embeddings_batch(["net payout"])
+
+        assert embeddings == [[10.0]]
+        assert client.calls == 3
+
+    def test_server_errors_are_retried_but_bad_requests_are_not(self, service):
+        """Test 5xx responses are retried while a 400 fails the batch at once."""
+        service.rate_limit_delay = 0
+        client = service.aclient = FakeAsyncOpenAI(rate_limited_calls=1, error=InternalServerError)
+        assert service.generate_embeddings_batch(["fee"]) == [[3.0]]
+        assert client.calls == 2
+
+        client = service.aclient = FakeAsyncOpenAI(rate_limited_calls=1, error=BadRequestError)
+        assert service.generate_embeddings_batch(["fee"]) == [[]]
+        assert client.calls == 1
+
+    def test_request_starts_are_paced_to_the_configured_rate(self):
+        """Test a requests-per-minute budget spaces batch requests evenly."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.document_cache_dir', ''), \
+                patch('src.services.embedding_service.settings.embedding_requests_per_minute', 1200):
+            service = EmbeddingService()
+        service.aclient = FakeAsyncOpenAI()
+        service.batch_size = 1
+
+        started = time.perf_counter()
+        embeddings = service.generate_embeddings_batch(["a", "bb", "ccc", "dddd"])
+
+        assert embeddings == [[1.0], [2.0], [3.0], [4.0]]
+        assert time.perf_counter() - started >= 3 * 60 / 1200
+
+    def test_batches_are_cut_at_item_or_token_limit(self, service):
+        """Test texts are packed until either the item cap or the token budget is reached."""
+        service.batch_size = 3
+        service.batch_token_budget = 4
+        texts = ["net payout", "fee", "refund", "gross order value", "vat", "iban"]
+
+        with patch('src.services.embedding_service._token_encoding', return_value=FakeEncoding()):
+            batches = service._batches(texts)
+
+        assert batches == [["net payout", "fee", "refund"], ["gross order value", "vat"], ["iban"]]
+
+    def test_requests_start_while_later_batches_are_packed(self, service):
+        """Test the first batch is sent before token counting reaches the last text."""
+        client = service.aclient = FakeAsyncOpenAI()
+        service.batch_size = 1
+        counted_after_first_request = []
+
+        def count_tokens(text):
+            if text == "ccc":
+                deadline = time.perf_counter() + 5
+                while client.calls == 0 and time.perf_counter() < deadline:
+                    time.sleep(0.01)
+                counted_after_first_request.append(client.calls > 0)
+            return 1
+
+        with patch.object(service, '_count_tokens', side_effect=count_tokens):
+            embeddings = service.generate_embeddings_batch(["a", "bb", "ccc"])
+
+        assert embeddings == [[1.0], [2.0], [3.0]]
+        assert counted_after_first_request == [True]
+
+    def test_sync_api_works_inside_running_event_loop(self, service):
+        """Test the sync wrapper can be called from async code such as API routes."""
+        service.aclient = FakeAsyncOpenAI()
+
+        async def route():
+            return service.generate_embeddings_batch(["fee"])
+
+        embeddings = asyncio.run(route())
+
+        assert embeddings == [[3.0]]
+
+    def test_sync_and_async_calls_reuse_one_client(self, service):
+        """Test repeated calls share the service's pooled async client."""
+        client = service.aclient = FakeAsyncOpenAI()
+
+        first = service.generate_embeddings_batch(["fee"])
+        second = asyncio.run(service.generate_embeddings_batch_async(["fee", "payout"]))
+
+        assert first == [[3.0]]
+        assert second == [[3.0], [6.0]]
+        assert client.calls == 2
+
+    def test_services_share_process_wide_clients(self, service):
+        """Test a second service reuses the first one's pooled clients."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.document_cache_dir', ''):
+            other = EmbeddingService()
+
+        assert other.client is service.client
+        assert other.aclient is service.aclient
+
+    def test_close_releases_both_clients(self, service):
+        """Test close shuts the pooled clients and later services get fresh ones."""
+        service.close()
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.document_cache_dir', ''):
+            later = EmbeddingService()
+
+        assert service.client.is_closed()
+        assert service.aclient.is_closed()
+        assert not later.client.is_closed()
+
+
+class FakeOpenAI:
+    """Stand-in for the sync OpenAI client counting single-text requests."""
+
+    def __init__(self):
+        self.calls = 0
+        self.options = None
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, model, input, **options):
+        self.calls += 1
+        self.options = options
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(input)), 1.0])])
+
+
+class TestSingleEmbedding:
+    """Test cases for single-text embedding generation."""
+
+    def test_repeated_text_is_served_from_memo(self, service):
+        """Test a repeated query costs one request and callers get independent lists."""
+        client = service.client = FakeOpenAI()
+
+        first = service.generate_embedding("commission fees")
+        first.append(99.0)
+        second = service.generate_embedding("commission fees")
+
+        assert second == [15.0, 1.0]
+        assert client.calls == 1
+
+    def test_persistent_cache_is_consulted_before_the_api(self, tmp_path):
+        """Test a fresh service answers a known text from the SQLite cache."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.document_cache_dir', str(tmp_path)):
+            writer = EmbeddingService()
+            reader = EmbeddingService()
+        writer.client = FakeOpenAI()
+        writer.generate_embedding("refund")
+        client = reader.client = FakeOpenAI()
+
+        assert reader.generate_embedding("refund") == [6.0, 1.0]
+        assert client.calls == 0
+
+    def test_configured_dimensions_are_requested(self, service):
+        """Test the shortened embedding size is sent with every request."""
+        client = service.client = FakeOpenAI()
+
+        service.generate_embedding("fee")
+
+        assert service.model == "text-embedding-3-small"
+        assert client.options == {"dimensions": 512}
+
+    def test_dimensions_are_rejected_for_ada(self):
+        """Test ada-002, which cannot shorten embeddings, fails fast with dimensions set."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.embedding_model', 'text-embedding-ada-002'):
+            with pytest.raises(ValueError, match="dimensions"):
+                EmbeddingService()
+
+    def test_connection_check_always_calls_the_api(self, service):
+        """Test repeated connection checks are not answered from the memo."""
+        client = service.client = FakeOpenAI()
+
+        assert service.test_connection() and service.test_connection()
+        assert client.calls == 2
+
+
+class FakeBatchOpenAI:
+    """Stand-in for the Batch API: jobs complete on the second status check."""
+
+    def __init__(self, failing_request=None):
+        self.failing_request = failing_request
+        self.uploaded = []
+        self.files = SimpleNamespace(create=self.create_file, content=self.file_content)
+        self.batches = SimpleNamespace(create=self.create_batch, retrieve=self.retrieve_batch)
+
+    def create_file(self, file, purpose):
+        self.uploaded = [json.loads(line) for line in file[1].decode("utf-8").splitlines()]
+        return SimpleNamespace(id="file-in")
+
+    def create_batch(self, input_file_id, endpoint, completion_window):
+        return SimpleNamespace(id="batch-1", status="validating", output_file_id=None)
+
+    def retrieve_batch(self, batch_id):
+        return SimpleNamespace(id=batch_id, status="completed", output_file_id="file-out")
+
+    def file_content(self, file_id):
+        lines = []
+        # Output order is not guaranteed to follow the input file
+        for request in reversed(self.uploaded):
+            if request["custom_id"] == self.failing_request:
+                response = {"status_code": 400, "body": {"error": {"message": "bad input"}}}
+            else:
+                data = [{"index": i, "embedding": [float(len(text))]} for i, text in enumerate(request["body"]["input"])]
+                response = {"status_code": 200, "body": {"data": list(reversed(data))}}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "response": response, "error": None}))
+        return SimpleNamespace(text="\n".join(lines))
+
+
+class TestOfflineEmbeddings:
+    """Test cases for Batch API embedding jobs."""
+
+    def test_job_results_are_returned_in_input_order(self, service):
+        """Test batches are uploaded as JSONL and results are reassembled in order."""
+        client = service.client = FakeBatchOpenAI()
+        service.batch_size = 2
+
+        embeddings = service.generate_embeddings_batch_offline(["a", "bb", "ccc", "bb", "dddd"], poll_interval=0)
+
+        assert embeddings == [[1.0], [2.0], [3.0], [2.0], [4.0]]
+        assert [request["body"]["input"] for request in client.uploaded] == [["a", "bb"], ["ccc", "dddd"]]
+        assert client.uploaded[0]["body"]["dimensions"] == 512
+
+    def test_failed_request_yields_empty_embeddings(self, service):
+        """Test a failed request inside the job only empties its own texts."""
+        service.client = FakeBatchOpenAI(failing_request="0")
+        service.batch_size = 2
+
+        embeddings = service.generate_embeddings_batch_offline(["a", "bb", "ccc"], poll_interval=0)
+
+        assert embeddings == [[], [], [3.0]]
+
+
+class TestProcessDocumentsWithEmbeddings:
+    """Test cases for the module-level embedding helper."""
+
+    def test_service_is_created_and_tested_once(self, service):
+        """Test repeated calls reuse one connection-tested service."""
+        embedding_module._default_embedding_service.cache_clear()
+        service.aclient = FakeAsyncOpenAI()
+        service.storage_dtype = None
+        try:
+            with patch.object(embedding_module, 'EmbeddingService', return_value=service) as factory, \
+                    patch.object(service, 'test_connection', return_value=True) as check:
+                first = process_documents_with_embeddings([{"content": "fee"}])
+                second = process_documents_with_embeddings([{"content": "payout"}])
+        finally:
+            embedding_module._default_embedding_service.cache_clear()
+
+        assert first[0]["embedding"] == [3.0]
+        assert second[0]["embedding"] == [6.0]
+        assert factory.call_count == 1
+        assert check.call_count == 1
+
+    def test_failed_connection_test_is_retried(self, service):
+        """Test a failed connection check is not remembered."""
+        embedding_module._default_embedding_service.cache_clear()
+        try:
+            with patch.object(embedding_module, 'EmbeddingService', return_value=service), \
+                    patch.object(service, 'test_connection', return_value=False) as check:
+                for _ in range(2):
+                    with pytest.raises(RuntimeError):
+                        process_documents_with_embeddings([{"content": "fee"}])
+        finally:
+            embedding_module._default_embedding_service.cache_clear()
+
+        assert check.call_count == 2
+
+
+class FakeEncoding:
+    """Stand-in tiktoken encoding with one token per word."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split(" ")
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+class TestEmbeddingCache:
+    """Test cases for the persistent embedding cache."""
+
+    @pytest.fixture
+    def cached_service(self, tmp_path):
+        """Embedding service caching under a temporary directory."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.document_cache_dir', str(tmp_path)):
+            yield EmbeddingService()
+
+    def test_only_uncached_texts_are_sent(self, cached_service):
+        """Test a repeat call serves known texts from the cache and keeps input order."""
+        client = cached_service.aclient = FakeAsyncOpenAI()
+        cached_service.generate_embeddings_batch(["fee", "payout"])
+
+        embeddings = cached_service.generate_embeddings_batch(["refund", "fee", "payout"])
+
+        assert embeddings == [[6.0], [3.0], [6.0]]
+        assert client.calls == 2
+
+    def test_failed_embeddings_are_not_cached(self, cached_service):
+        """Test texts whose batch failed are requested again on the next call."""
+        cached_service.aclient = FakeAsyncOpenAI(fail_on={"fee"})
+        assert cached_service.generate_embeddings_batch(["fee"]) == [[]]
+
+        client = cached_service.aclient = FakeAsyncOpenAI()
+        assert cached_service.generate_embeddings_batch(["fee"]) == [[3.0]]
+        assert client.calls == 1
+
+    def test_entries_are_keyed_by_model(self, tmp_path):
+        """Test vectors round-trip as float32 and are not shared between models."""
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        text_hash = EmbeddingCache.text_hash("Commission is 30%.")
+
+        cache.put_many("text-embedding-ada-002", [(text_hash, [0.5, -0.25])])
+
+        assert cache.get_many("text-embedding-ada-002", [text_hash]) == {text_hash: [0.5, -0.25]}
+        assert cache.get_many("text-embedding-3-small", [text_hash]) == {}
+
+
+class TestEmbeddingChunkStream:
+    """Test cases for streaming chunks through embedding generation."""
+
+    def test_next_group_is_prefetched_while_consuming(self, service):
+        """Test exactly one further group is read and embedded ahead of the consumer."""
+        service.batch_size = 2
+        service.max_concurrency = 1
+        service.storage_dtype = None
+        pulled = []
+
+        def chunks():
+            for number in range(5):
+                pulled.append(number)
+                yield {"content": "x" * (number + 1), "chunk_number": number}
+
+        with patch.object(service, 'generate_embeddings_batch',
+                          side_effect=lambda texts: [[float(len(text))] for text in texts]):
+            stream = service.iter_chunks_with_embeddings(chunks())
+            first = next(stream)
+            pulled_before_rest = len(pulled)
+            rest = list(stream)
+
+        assert pulled_before_rest == 4
+        assert first["embedding"] == [1.0]
+        assert [chunk["embedding"] for chunk in rest] == [[2.0], [3.0], [4.0], [5.0]]
+        assert all(chunk["embedding_dimensions"] == 1 for chunk in rest)
+
+
+class TestEmbeddingTruncation:
+    """Test cases for token-limit truncation."""
+
+    def test_text_is_cut_at_exact_token_limit(self, service):
+        """Test long text keeps exactly max_tokens tokens."""
+        service.max_tokens = 3
+
+        with patch('src.services.embedding_service._token_encoding', return_value=FakeEncoding()):
+            truncated = service._truncate_text("Commission is thirty percent of gross value")
+            untouched = service._truncate_text("Payouts are weekly")
+
+        assert truncated == "Commission is thirty"
+        assert untouched == "Payouts are weekly"
+
+    def test_character_estimate_is_used_without_encoding(self, service):
+        """Test truncation falls back to ~4 characters per token when tiktoken is unavailable."""
+        service.max_tokens = 5
+
+        with patch('src.services.embedding_service._token_encoding', return_value=None):
+            truncated = service._truncate_text("Payouts are weekly on Mondays")
+
+        assert truncated == "Payouts are weekly"
+
+    def test_batch_texts_are_encoded_once(self, service):
+        """Test texts encoded while truncating are packed by that count, not encoded again."""
+        service.aclient = FakeAsyncOpenAI()
+        service.max_tokens = 3
+        service.batch_token_budget = 4
+        encoded = []
+        encoding = FakeEncoding()
+
+        def encode(text, disallowed_special=()):
+            encoded.append(text)
+            return encoding.encode(text)
+
+        texts = ["net payout per week", "gross order value", "fee", "vat"]
+        with patch('src.services.embedding_service._token_encoding',
+                   return_value=SimpleNamespace(encode=encode, decode=encoding.decode)):
+            embeddings = service.generate_embeddings_batch(texts)
+
+        assert embeddings == [[14.0], [17.0], [3.0], [3.0]]
+        assert sorted(encoded) == sorted(texts)
+
+
+class TestEmbeddingSimilarity:
+    """Test cases for cosine similarity."""
+
+    def test_similarity_matches_cosine_definition(self, service):
+        """Test lists and arrays give the cosine of the angle between them."""
+        embedding1 = [1.0, 2.0, 3.0]
+        embedding2 = [3.0, 2.0, 1.0]
+
+        from_lists = service.calculate_similarity(embedding1, embedding2)
+        from_arrays = service.calculate_similarity(np.array(embedding1), np.array(embedding2, dtype=np.float32))
+
+        assert from_lists == pytest.approx(10 / 14)
+        assert from_arrays == pytest.approx(10 / 14)
+        assert isinstance(from_lists, float)
+
+    def test_float32_arrays_use_simsimd_when_installed(self, service):
+        """Test compact arrays are handed to SimSIMD and lists keep the NumPy path."""
+        fake_simsimd = SimpleNamespace(cosine=lambda a, b: 0.25)
+        vector = np.array([0.6, 0.8], dtype=np.float32)
+
+        with patch.object(embedding_module, 'simsimd', fake_simsimd):
+            assert service.calculate_similarity(vector, vector) == pytest.approx(0.75)
+            assert service.calculate_similarity(vector, np.zeros(2, dtype=np.float32)) == 0.0
+            assert service.calculate_similarity([0.6, 0.8], [0.6, 0.8]) == pytest.approx(1.0)
+
+    def test_compiled_kernel_matches_numpy_path(self, service):
+        """Test float arrays scored by the cosine kernel agree with the list path."""
+        vector1 = np.array([0.5, -1.5, 2.0, 0.25], dtype=np.float32)
+        vector2 = np.array([1.0, 0.5, -0.75, 3.0], dtype=np.float32)
+
+        with patch.object(embedding_module, 'simsimd', None):
+            kernel_score = service.calculate_similarity(vector1, vector2)
+            zero_score = service.calculate_similarity(vector1, np.zeros(4, dtype=np.float32))
+
+        assert kernel_score == pytest.approx(service.calculate_similarity(vector1.tolist(), vector2.tolist()), abs=1e-6)
+        assert zero_score == 0.0
+
+    def test_similarity_handles_empty_and_zero_vectors(self, service):
+        """Test empty or zero-magnitude vectors score 0.0 instead of failing."""
+        assert service.calculate_similarity([], [1.0]) == 0.0
+        assert service.calculate_similarity(np.zeros(3), np.ones(3)) == 0.0
+
+    def test_similarity_rejects_mismatched_dimensions(self, service):
+        """Test vectors of different lengths raise ValueError."""
+        with pytest.raises(ValueError, match="dimensions must match"):
+            service.calculate_similarity([1.0, 0.0], [1.0, 0.0, 0.0])
+
+
+    def test_similarity_matrix_matches_pairwise_scores(self, service):
+        """Test the batch variant scores every query/document pair like calculate_similarity."""
+        queries = [[1.0, 2.0, 3.0], [0.0, 1.0, 0.0]]
+        documents = np.array([[3.0, 2.0, 1.0], [0.0, 0.0, 0.0], [1.0, 2.0, 3.0]], dtype=np.float32)
+
+        scores = service.calculate_similarity_matrix(queries, documents)
+
+        assert scores.shape == (2, 3)
+        expected = [[service.calculate_similarity(query, document) for document in documents] for query in queries]
+        assert np.allclose(scores, expected)
+        with pytest.raises(ValueError, match="dimensions must match"):
+            service.calculate_similarity_matrix([[1.0, 0.0]], documents)
+
+
+    def test_normalized_similarity_is_clipped_dot_product(self, service):
+        """Test unit vectors are scored by their dot product, clipped to [-1, 1]."""
+        unit = np.array([0.6, 0.8], dtype=np.float16)
+
+        assert service.calculate_similarity([1.0, 0.0], [0.6, 0.8], normalized=True) == pytest.approx(0.6)
+        assert service.calculate_similarity(unit, unit, normalized=True) <= 1.0
+        assert service.calculate_similarity_matrix([[1.0, 0.0]], [[0.6, 0.8], [-1.0, 0.0]],
+                                                   normalized=True).tolist() == [[pytest.approx(0.6), -1.0]]
+
+    def test_rank_returns_top_documents_best_first(self, service):
+        """Test ranking picks the k most similar documents in descending order."""
+        documents = [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8], [-1.0, 0.0]]
+
+        indices, scores = service.rank_embeddings([0.8, 0.6], documents, top_k=2, normalized=True)
+        all_indices, _ = service.rank_embeddings(np.array([0.8, 0.6]), documents, top_k=10)
+
+        assert indices.tolist() == [2, 0]
+        assert scores.tolist() == pytest.approx([0.96, 0.8])
+        assert all_indices.tolist() == [2, 0, 1, 3]
+
+    def test_int8_matrices_score_close_to_float_cosine(self, service):
+        """Test quantized unit vectors keep their cosine scores up to rounding."""
+        rng = np.random.default_rng(7)
+        vectors = rng.normal(size=(5, 1536))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+        quantized, _ = service.quantize_embeddings(vectors)
+        scores = service.calculate_similarity_matrix(quantized[:2], quantized)
+
+        assert quantized.dtype == np.int8
+        assert np.abs(quantized).max(axis=1).tolist() == [127] * 5
+        assert np.allclose(scores, vectors[:2] @ vectors.T, atol=0.005)
+        assert service.calculate_similarity(quantized[0], quantized[1]) == pytest.approx(scores[0, 1])
+
+    def test_int8_codes_dequantize_with_their_scale(self, service):
+        """Test codes times the per-vector scale restore each vector, magnitude included."""
+        rng = np.random.default_rng(7)
+        vectors = rng.normal(size=(3, 512)) * np.array([[0.5], [2.0], [0.0]])
+
+        codes, scales = service.quantize_embeddings(vectors)
+        restored = service.dequantize_embeddings(codes, scales)
+
+        assert scales.dtype == np.float32
+        assert scales[2] == 0.0
+        assert restored.dtype == np.float32
+        assert np.abs(restored - vectors).max(axis=1).tolist() <= (scales / 2 + 1e-6).tolist()
+        assert np.linalg.norm(restored, axis=1) == pytest.approx(np.linalg.norm(vectors, axis=1), rel=0.01)
+
+
+class TestEmbeddingStorage:
+    """Test cases for how chunk embeddings are stored."""
+
+    def test_chunk_embeddings_use_configured_dtype(self):
+        """Test embeddings are held as arrays of the configured float width."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.embedding_storage_dtype', 'float16'):
+            service = EmbeddingService()
+
+        with patch.object(service, 'generate_embeddings_batch', return_value=[[0.5, -0.5, 0.5, -0.5]]):
+            chunks = service.add_embeddings_to_chunks([{"content": "Commission is 30%."}])
+
+        assert chunks[0]["embedding"].dtype == np.float16
+        assert chunks[0]["embedding"].tolist() == [0.5, -0.5, 0.5, -0.5]
+        assert chunks[0]["embedding_dimensions"] == 4
+
+    def test_int8_storage_adds_codes_and_scale_to_chunks(self):
+        """Test chunks carry int8 codes whose scale restores the float embedding."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.embedding_int8', True):
+            service = EmbeddingService()
+
+        with patch.object(service, 'generate_embeddings_batch', return_value=[[0.5, -0.25, 0.75, -0.25], []]):
+            chunks = service.add_embeddings_to_chunks([{"content": "Commission is 30%."}, {"content": ""}])
+
+        assert chunks[0]["embedding_i8"].dtype == np.int8
+        restored = service.dequantize_embeddings(chunks[0]["embedding_i8"], [chunks[0]["embedding_scale"]])
+        assert restored[0] == pytest.approx(np.asarray(chunks[0]["embedding"]), abs=chunks[0]["embedding_scale"] / 2)
+        assert "embedding_i8" not in chunks[1]
+
+    def test_default_storage_is_float32(self, service):
+        """Test chunk embeddings are float32 arrays unless configured otherwise."""
+        with patch.object(service, 'generate_embeddings_batch', return_value=[[0.6, 0.8]]):
+            chunks = service.add_embeddings_to_chunks([{"content": "Fees"}])
+
+        assert chunks[0]["embedding"].dtype == np.float32
+
+    def test_group_embeddings_share_one_contiguous_matrix(self):
+        """Test typed embeddings of a group are unit rows of one matrix; failures stay empty."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.embedding_storage_dtype', 'float32'):
+            service = EmbeddingService()
+        chunks = [{"content": "Fees"}, {"content": "Terms"}, {"content": "Refunds"}]
+
+        with patch.object(service, 'generate_embeddings_batch', return_value=[[0.6, 0.8], [], [3.0, 4.0]]):
+            embedded = service.add_embeddings_to_chunks(chunks)
+
+        first, failed, last = (chunk["embedding"] for chunk in embedded)
+        assert first.base is not None and first.base is last.base
+        assert first.base.flags["C_CONTIGUOUS"] and first.base.shape == (2, 2)
+        assert last.tolist() == pytest.approx([0.6, 0.8])
+        assert failed == [] and embedded[1]["embedding_dimensions"] == 0
+
+    def test_unsupported_dtype_is_rejected(self):
+        """Test a non-float storage dtype fails at construction."""
+        with patch('src.services.embedding_service.settings.openai_api_key', 'sk-test'), \
+                patch('src.services.embedding_service.settings.embedding_storage_dtype', 'int8'):
+            with pytest.raises(ValueError, match="Unsupported embedding storage dtype"):
+                EmbeddingService()
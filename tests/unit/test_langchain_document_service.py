@@ -0,0 +1,299 @@
+"""
+Tests for LangChain document processing service.
+"""
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from src.services import langchain_document_service as langchain_module
+from src.services.langchain_document_service import LangChainDocumentProcessor
+
+
+@pytest.fixture(autouse=True)
+def fresh_splitters():
+    """Drop shared splitters so each test sees its own splitter backend; no document cache."""
+    langchain_module._get_text_splitter.cache_clear()
+    with patch('src.services.langchain_document_service.settings.document_cache_dir', ''):
+        yield
+    langchain_module._get_text_splitter.cache_clear()
+
+
+class FakeNativeTextSplitter:
+    """Stand-in for semantic_text_splitter.TextSplitter splitting on blank lines."""
+
+    def __init__(self, capacity, overlap=0):
+        self.capacity = capacity
+        self.overlap = overlap
+
+    def chunks(self, text):
+        return [part for part in text.split("\n\n") if part]
+
+
+def _chunk_spans(text, chunks):
+    """Locate each chunk in text, in order, as (start, end) offsets."""
+    spans = []
+    position = 0
+    for chunk in chunks:
+        start = text.index(chunk, position)
+        spans.append((start, start + len(chunk)))
+        position = start + 1
+    return spans
+
+
+class TestLangChainTextSplitter:
+    """Test cases for text splitter selection."""
+
+    def test_recursive_splitter_is_used_without_native_splitter(self):
+        """Test the LangChain splitter is the fallback when semantic-text-splitter is missing."""
+        with patch.object(langchain_module, 'NativeTextSplitter', None):
+            processor = LangChainDocumentProcessor()
+
+        assert isinstance(processor.text_splitter, RecursiveCharacterTextSplitter)
+
+    def test_native_splitter_chunks_become_documents(self):
+        """Test native splitter output is wrapped into Documents with chunk metadata."""
+        with patch.object(langchain_module, 'NativeTextSplitter', FakeNativeTextSplitter), \
+                patch('src.services.langchain_document_service.settings.chunk_size', 20):
+            processor = LangChainDocumentProcessor()
+            documents = processor.process_text_for_rag(
+                "Commission is 30%.\n\nPayout is weekly.", {"partner_name": "Sushi Express"}
+            )
+
+        assert [document.page_content for document in documents] == ["Commission is 30%.", "Payout is weekly."]
+        assert documents[1].metadata["chunk_id"] == "text_input_1"
+        assert documents[1].metadata["total_chunks"] == 2
+        assert documents[1].metadata["partner_name"] == "Sushi Express"
+
+    def test_native_splitter_matches_recursive_chunk_sizes_and_overlap(self):
+        """Test the real semantic-text-splitter keeps the LangChain splitter's size and overlap limits."""
+        native_module = pytest.importorskip("semantic_text_splitter")
+        terms = [
+            "commission is 30% of gross order value.",
+            "payouts are sent weekly to the partner account.",
+            "refunds are deducted net of VAT.",
+            "delivery fees are charged per order.",
+        ]
+        # Numbered clauses keep every chunk's position in the text unambiguous
+        clauses = iter(f"Clause {number}: {terms[number % 4]}" for number in range(1000))
+        paragraphs = [" ".join(next(clauses) for _ in range(p % 4 + 2)) for p in range(12)]
+        # One paragraph longer than a chunk, so it is split with overlap
+        paragraphs.insert(6, " ".join(next(clauses) for _ in range(16)))
+        text = "\n\n".join(paragraphs)
+
+        with patch.object(langchain_module, 'NativeTextSplitter', native_module.TextSplitter):
+            native = langchain_module._get_text_splitter(300, 60)
+        recursive = RecursiveCharacterTextSplitter(
+            chunk_size=300, chunk_overlap=60, length_function=len, separators=["\n\n", "\n", " ", ""]
+        )
+
+        native_chunks = native.split_text(text)
+        recursive_chunks = recursive.split_text(text)
+
+        assert isinstance(native, langchain_module._NativeSplitterAdapter)
+        assert len(native_chunks) == len(recursive_chunks)
+        for chunks in (native_chunks, recursive_chunks):
+            spans = _chunk_spans(text, chunks)
+            assert max(len(chunk) for chunk in chunks) <= 300
+            assert all(chunk == chunk.strip() for chunk in chunks)
+            # Consecutive chunks share at most chunk_overlap characters and leave no text out
+            overlaps = [prev_end - start for (_, prev_end), (start, _) in zip(spans, spans[1:])]
+            assert max(overlaps) > 0 and max(overlaps) <= 60
+            assert not text[:spans[0][0]].strip() and not text[spans[-1][1]:].strip()
+            assert all(not text[prev_end:start].strip() for (_, prev_end), (start, _) in zip(spans, spans[1:]))
+
+    def test_processors_share_one_splitter_per_configuration(self):
+        """Test the splitter is built once and reused by later processors."""
+        first = LangChainDocumentProcessor()
+        second = LangChainDocumentProcessor()
+
+        assert first.text_splitter is second.text_splitter
+
+
+class TestLangChainShortText:
+    """Test cases for text that fits in a single chunk."""
+
+    def test_short_text_skips_the_splitter(self):
+        """Test text within chunk_size becomes one stripped chunk without splitting."""
+        processor = LangChainDocumentProcessor()
+
+        with patch.object(processor.text_splitter, 'split_text', side_effect=AssertionError("split")):
+            documents = processor.process_text_for_rag("\n  Commission is 30%.\n\nPayout is weekly.  \n")
+
+        assert [doc.page_content for doc in documents] == ["Commission is 30%.\n\nPayout is weekly."]
+        assert documents[0].metadata["total_chunks"] == 1
+
+    def test_short_text_matches_splitter_output(self):
+        """Test the fast path returns what the recursive splitter returns."""
+        processor = LangChainDocumentProcessor()
+        text = " Fee:\r\n5%\n\n\n\nRefunds\tnet of VAT. "
+
+        assert processor._split_text(text) == processor.text_splitter.split_text(text)
+
+
+class TestLangChainFileDocuments:
+    """Test cases for converting files into Documents."""
+
+    def test_streamed_documents_match_processed_file(self, tmp_path):
+        """Test iter_documents_for_rag yields the same Documents process_file_for_rag returns."""
+        file_path = tmp_path / "sushi_express_contract.txt"
+        file_path.write_text("Commission is 30% of gross order value. " * 60)
+        processor = LangChainDocumentProcessor()
+
+        streamed = processor.iter_documents_for_rag(str(file_path), {"partner_name": "Sushi Express"})
+        first = next(streamed)
+        documents = [first, *streamed]
+        processed = processor.process_file_for_rag(str(file_path), {"partner_name": "Sushi Express"})
+
+        assert len(documents) == len(processed) > 1
+        assert [doc.page_content for doc in documents] == [doc.page_content for doc in processed]
+        assert first.metadata["chunk_id"] == "sushi_express_contract.txt_0"
+        assert first.metadata["total_chunks"] == len(processed)
+
+    def test_missing_file_raises(self, tmp_path):
+        """Test a missing path raises FileNotFoundError."""
+        processor = LangChainDocumentProcessor()
+
+        with pytest.raises(FileNotFoundError):
+            processor.process_file_for_rag(str(tmp_path / "missing.txt"))
+
+    def test_unsupported_extension_raises(self, tmp_path):
+        """Test files without a registered extractor are rejected."""
+        file_path = tmp_path / "payout.csv"
+        file_path.write_text("net,1250")
+        processor = LangChainDocumentProcessor()
+
+        with pytest.raises(ValueError, match="Unsupported file type: .csv"):
+            processor.process_file_for_rag(str(file_path))
+
+    def test_markdown_uses_text_extractor(self, tmp_path):
+        """Test .md files are read by the text file extractor."""
+        file_path = tmp_path / "terms.md"
+        file_path.write_text("# Terms")
+        processor = LangChainDocumentProcessor()
+
+        with patch.object(processor.base_processor, '_extract_text_file', return_value="Payout is weekly.") as extract:
+            documents = processor.process_file_for_rag(str(file_path))
+
+        extract.assert_called_once_with(str(file_path))
+        assert documents[0].page_content == "Payout is weekly."
+
+
+class TestLangChainDocumentCache:
+    """Test cases for the per-file Document cache."""
+
+    @pytest.fixture
+    def contract(self, tmp_path):
+        """Small contract file."""
+        file_path = tmp_path / "sushi_express_contract.txt"
+        file_path.write_text("Commission is 30% of gross order value.")
+        return file_path
+
+    def test_unchanged_file_is_served_from_cache(self, contract, tmp_path):
+        """Test a second run skips extraction and returns independent copies."""
+        with patch('src.services.langchain_document_service.settings.document_cache_dir', str(tmp_path / "cache")):
+            processor = LangChainDocumentProcessor()
+        first = processor.process_file_for_rag(str(contract))
+        first[0].metadata["partner_name"] = "changed by caller"
+
+        with patch.object(processor.base_processor, '_extract_text_file', side_effect=AssertionError("extracted")):
+            second = processor.process_file_for_rag(str(contract))
+
+        assert [doc.page_content for doc in second] == ["Commission is 30% of gross order value."]
+        assert "partner_name" not in second[0].metadata
+
+    def test_modified_file_is_processed_again(self, contract, tmp_path):
+        """Test a new mtime or size maps to a fresh cache entry."""
+        with patch('src.services.langchain_document_service.settings.document_cache_dir', str(tmp_path / "cache")):
+            processor = LangChainDocumentProcessor()
+        processor.process_file_for_rag(str(contract))
+
+        contract.write_text("Commission is 25% of gross order value.")
+        documents = processor.process_file_for_rag(str(contract))
+
+        assert [doc.page_content for doc in documents] == ["Commission is 25% of gross order value."]
+
+    def test_use_cache_false_bypasses_cache(self, contract, tmp_path):
+        """Test one-off files such as uploads never write cache entries."""
+        with patch('src.services.langchain_document_service.settings.document_cache_dir', str(tmp_path / "cache")):
+            processor = LangChainDocumentProcessor()
+        documents = processor.process_file_for_rag(str(contract), use_cache=False)
+
+        assert documents[0].page_content == "Commission is 30% of gross order value."
+        assert not os.path.exists(processor.cache.cache_dir)
+
+    def test_cache_is_pruned_to_size_limit(self, tmp_path):
+        """Test the Document cache keeps only what fits in its size limit."""
+        with patch('src.services.langchain_document_service.settings.document_cache_dir', str(tmp_path / "cache")):
+            processor = LangChainDocumentProcessor()
+        processor.cache.max_bytes = 1
+
+        for name in ("first.txt", "second.txt"):
+            contract = tmp_path / name
+            contract.write_text(f"Commission terms of {name}.")
+            processor.process_file_for_rag(str(contract))
+
+        assert os.listdir(processor.cache.cache_dir) == []
+
+
+class TestLangChainPartnerDocuments:
+    """Test cases for processing a partner's document directory."""
+
+    @pytest.fixture
+    def partner_dir(self, tmp_path):
+        """Directory with a contract, a payout report and an unrelated partner's file."""
+        (tmp_path / "sushi_express_contract.txt").write_text("Commission is 30% of gross order value.")
+        (tmp_path / "sushi_express_payout.txt").write_text("Net payout 1,250.00 EUR.")
+        (tmp_path / "pizza_palace_contract.txt").write_text("Commission is 25%.")
+        return tmp_path
+
+    @pytest.mark.parametrize("cpu_count, min_bytes", [(1, 0), (2, 0), (2, 10**9)])
+    def test_partner_files_are_grouped_by_type(self, partner_dir, cpu_count, min_bytes):
+        """Test sequential and worker-process runs both group the partner's files by type."""
+        processor = LangChainDocumentProcessor()
+
+        with patch('src.services.langchain_document_service.os.cpu_count', return_value=cpu_count), \
+                patch('src.services.langchain_document_service.PARALLEL_MIN_BYTES', min_bytes), \
+                patch('src.services.langchain_document_service.ProcessPoolExecutor',
+                      wraps=langchain_module.ProcessPoolExecutor) as pool:
+            partner_docs = processor.process_partner_documents("Sushi Express", str(partner_dir))
+
+        if cpu_count > 1 and not min_bytes:
+            assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+        else:
+            pool.assert_not_called()
+
+        assert [doc.page_content for doc in partner_docs["contract"]] == ["Commission is 30% of gross order value."]
+        assert [doc.page_content for doc in partner_docs["payout_report"]] == ["Net payout 1,250.00 EUR."]
+        assert partner_docs["other"] == []
+        assert partner_docs["contract"][0].metadata["title"] == "Sushi Express Partnership Agreement"
+
+    def test_scandir_stat_is_reused_for_file_size(self, partner_dir):
+        """Test files listed with scandir are not stat'ed again when processed."""
+        processor = LangChainDocumentProcessor()
+
+        with patch('src.services.langchain_document_service.os.cpu_count', return_value=1), \
+                patch('src.services.langchain_document_service.os.stat', wraps=os.stat) as stat:
+            partner_docs = processor.process_partner_documents("Sushi Express", str(partner_dir))
+
+        stat_paths = [os.path.basename(str(call.args[0])) for call in stat.call_args_list]
+        assert not [name for name in stat_paths if name.endswith(".txt")]
+        payout = partner_docs["payout_report"][0]
+        assert payout.metadata["file_size"] == len("Net payout 1,250.00 EUR.")
+
+    def test_file_names_are_matched_case_insensitively(self, tmp_path):
+        """Test upper-case names and extensions are picked up and contract wins over report."""
+        (tmp_path / "Sushi_Express_Report.TXT").write_text("Net payout 1,250.00 EUR.")
+        (tmp_path / "sushi_express_report_contract.txt").write_text("Commission is 30%.")
+        processor = LangChainDocumentProcessor()
+
+        with patch('src.services.langchain_document_service.os.cpu_count', return_value=1):
+            partner_docs = processor.process_partner_documents("Sushi Express", str(tmp_path))
+
+        assert [doc.page_content for doc in partner_docs["payout_report"]] == ["Net payout 1,250.00 EUR."]
+        assert [doc.page_content for doc in partner_docs["contract"]] == ["Commission is 30%."]
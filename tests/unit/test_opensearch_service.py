@@ -204,6 +204,42 @@ class TestOpenSearchService:
         assert count == 42
         mock_client.count.assert_called_once_with(index="financial_documents")
 
+    def test_serializer_encodes_numpy_embeddings(self):
+        """Test chunk bodies with ndarray embeddings and datetimes serialize like the stock serializer."""
+        import json
+        import numpy as np
+        from datetime import timezone
+        from opensearchpy import JSONSerializer
+        pytest.importorskip("orjson")
+        from src.services import opensearch_service
+
+        serializer = opensearch_service._OrjsonSerializer()
+        body = {
+            "content": "Commission is 30%",
+            "embedding": np.array([0.5, -0.25, 0.125], dtype=np.float32),
+            "embedding_i8": np.array([127, -64, 32], dtype=np.int8),
+            "embedding_scale": np.float32(0.00390625),
+            "created_at": datetime(2024, 1, 1, 9, 30),
+            "contract_date": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        }
+
+        encoded = serializer.dumps(body)
+
+        assert isinstance(encoded, str)
+        assert json.loads(encoded) == json.loads(JSONSerializer().dumps(body))
+        assert json.loads(encoded)["created_at"] == "2024-01-01T09:30:00"
+        assert serializer.dumps('{"query": {}}') == '{"query": {}}'
+
+    @patch('src.services.opensearch_service.OpenSearch')
+    def test_client_uses_orjson_serializer(self, mock_opensearch):
+        """Test the client is built with the orjson serializer when orjson is installed."""
+        pytest.importorskip("orjson")
+        from src.services.opensearch_service import OpenSearchService, _OrjsonSerializer
+
+        OpenSearchService()
+
+        assert isinstance(mock_opensearch.call_args[1]['serializer'], _OrjsonSerializer)
+
 
 class TestOpenSearchAPIEndpoints:
     """Test cases for OpenSearch API endpoints."""